@@ -3,7 +3,46 @@ Agent: Analyze the context of a selected GitHub issue.
 """
 from typing import Dict
 from graph.state import AgentState
-from utils.github_client import get_issue_details
+from utils.github_client import get_issue_details, get_issues_details_async
+from utils.github_graphql import fetch_issue_contexts, fetch_issue_contexts_sync
+
+
+def _new_analysis(url: str, details: Dict) -> Dict:
+    """Compile issue details into a fresh analysis entry."""
+    context = f"""
+**Issue Title:** {details['title']}
+
+**Description:**
+{details['body']}
+
+**Recent Comments:**
+{chr(10).join(details['comments'][:3])}
+"""
+    
+    return {
+        "issue_url": url,
+        "context": context.strip(),
+        "labels": details.get("labels", []),  # Used for model tiering
+        "solution_plan": "",  # Will be filled by next agent
+        "generated_prompt": ""  # Will be filled later
+    }
+
+
+def analyze_issue(url: str, api_url: str) -> Dict:
+    """
+    Fetch and compile the context for a single issue.
+    
+    Args:
+        url: The issue HTML URL
+        api_url: The API URL for the issue
+        
+    Returns:
+        Analysis entry with the issue context
+    """
+    print(f"  Fetching details for: {url}")
+    details = fetch_issue_contexts_sync([api_url]).get(api_url) or get_issue_details(api_url)
+    
+    return _new_analysis(url, details)
 
 
 def analyze_code_agent(state: AgentState) -> Dict:
@@ -24,33 +63,61 @@ def analyze_code_agent(state: AgentState) -> Dict:
     # Map URLs to API URLs
     url_to_api = {issue["url"]: issue["api_url"] for issue in found_issues}
     
+    urls = [url for url in selected_urls if url_to_api.get(url)]
+    
+    # One GraphQL round trip for all issues; REST for anything it missed
+    bulk_details = fetch_issue_contexts_sync([url_to_api[url] for url in urls])
+    
     analyses = []
     
-    for url in selected_urls:
-        api_url = url_to_api.get(url)
-        if not api_url:
-            continue
+    for url in urls:
+        details = bulk_details.get(url_to_api[url])
+        if details is None:
+            print(f"  Fetching details for: {url}")
+            details = get_issue_details(url_to_api[url])
         
-        print(f"  Fetching details for: {url}")
-        details = get_issue_details(api_url)
-        
-        # Compile context
-        context = f"""
-**Issue Title:** {details['title']}
+        analyses.append(_new_analysis(url, details))
+    
+    print(f"✅ Analyzed {len(analyses)} issues")
+    
+    return {
+        "analyses": analyses,
+        "current_step": "analysis_complete"
+    }
 
-**Description:**
-{details['body']}
 
-**Recent Comments:**
-{chr(10).join(details['comments'][:3])}
-"""
-        
-        analyses.append({
-            "issue_url": url,
-            "context": context.strip(),
-            "solution_plan": "",  # Will be filled by next agent
-            "generated_prompt": ""  # Will be filled later
-        })
+async def analyze_code_agent_async(state: AgentState) -> Dict:
+    """
+    Async version of analyze_code_agent.
+    
+    Issue details are fetched in bulk over GraphQL, with concurrent REST
+    fetches for any issue the batch could not resolve.
+    """
+    print("📖 Agent: Analyzing selected issues...")
+    
+    selected_urls = state.get("selected_issue_urls", [])
+    found_issues = state.get("found_issues", [])
+    
+    url_to_api = {issue["url"]: issue["api_url"] for issue in found_issues}
+    urls = [url for url in selected_urls if url_to_api.get(url)]
+    
+    # Details already fetched while resolving the issues are reused
+    bulk_details = {
+        issue["api_url"]: issue["details"]
+        for issue in found_issues if issue.get("details")
+    }
+    
+    to_fetch = [url_to_api[url] for url in urls if url_to_api[url] not in bulk_details]
+    if to_fetch:
+        bulk_details.update(await fetch_issue_contexts(to_fetch))
+    
+    missing = [url for url in urls if url_to_api[url] not in bulk_details]
+    if missing:
+        print(f"  Fetching details for {len(missing)} issue(s) over REST...")
+        rest_details = await get_issues_details_async([url_to_api[url] for url in missing])
+        bulk_details.update({url_to_api[url]: details for url, details in zip(missing, rest_details)})
+    
+    analyses = [_new_analysis(url, bulk_details[url_to_api[url]]) for url in urls]
     
     print(f"✅ Analyzed {len(analyses)} issues")
     
@@ -3,7 +3,7 @@ Agent: Find relevant GitHub issues based on user skills.
 """
 from typing import Dict
 from graph.state import AgentState
-from utils.github_client import search_good_first_issues
+from utils.github_client import search_good_first_issues, search_good_first_issues_async, search_is_exhaustive
 
 
 def find_issues_agent(state: AgentState) -> Dict:
@@ -34,3 +34,37 @@ def find_issues_agent(state: AgentState) -> Dict:
         "found_issues": issues,
         "current_step": "issues_found"
     }
+
+
+async def find_issues_agent_async(state: AgentState, max_results: int = 15) -> Dict:
+    """
+    Async version of find_issues_agent using the parallel per-language search.
+    
+    Args:
+        state: Current agent state with 'skills'
+        max_results: Maximum number of issues to return
+        
+    Returns:
+        Updated state with 'found_issues', 'search_exhaustive' (whether
+        found_issues holds every matching issue) and 'current_step'
+    """
+    print("🔍 Agent: Finding issues on GitHub...")
+    
+    skills = state.get("skills", [])
+    
+    if not skills:
+        return {
+            "error": "No skills provided",
+            "current_step": "error"
+        }
+    
+    total_counts = {}
+    issues = await search_good_first_issues_async(skills, max_results=max_results, total_counts=total_counts)
+    
+    print(f"✅ Found {len(issues)} issues")
+    
+    return {
+        "found_issues": issues,
+        "search_exhaustive": search_is_exhaustive(total_counts, skills, len(issues)),
+        "current_step": "issues_found"
+    }
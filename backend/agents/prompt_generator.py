@@ -2,25 +2,21 @@
 Agent: Generate optimized prompts using Cerebras Llama 3.1 8B.
 8B model is perfect for shorter, structured outputs.
 """
-from typing import Dict
+from typing import Dict, List, Optional
 from graph.state import AgentState
-from utils.cerebras_client import query_cerebras
+from utils.llm_client import TokenCallback
+from utils.context_budget import budget_prompt_inputs
+from utils.llm_router import route
+from utils.model_tiering import choose_tier, query_tiered, is_well_formed
+from utils.batching import batch_payload, response_format, parse_batch_response
 
 
-def generate_prompt_agent(state: AgentState) -> Dict:
-    """
-    Create 'golden prompts' using Llama 3.1 8B.
-    Fast model optimized for structured, shorter outputs.
-    """
-    print("✨ Agent: Generating AI-ready prompts...")
-    
-    analyses = state.get("analyses", [])
+def _prompt_request(analysis: Dict) -> str:
+    """Build the prompt-writing request for one analysis."""
+    inputs = budget_prompt_inputs("prompt", analysis["context"], analysis["solution_plan"])
+    context, plan = inputs["context"], inputs["plan"]
     
-    for analysis in analyses:
-        context = analysis["context"][:900]
-        plan = analysis["solution_plan"][:700]
-        
-        prompt = f"""You are an expert at writing prompts for AI coding assistants.
+    return f"""You are an expert at writing prompts for AI coding assistants.
 
 Create a detailed, comprehensive coding prompt:
 
@@ -37,18 +33,91 @@ Write a well-structured prompt that includes:
 4. Testing requirements
 
 Write the complete prompt that a developer can paste into ChatGPT/Claude:"""
-        
-        print(f"  Creating prompt for: {analysis['issue_url'][:50]}...")
-        
-        generated_prompt = query_cerebras(
-            prompt, 
-            max_tokens=600, 
-            temperature=0.6,
-            model="llama3.1-8b"  # ✅ Fast for shorter outputs
-        )
-        
-        if not generated_prompt:
-            generated_prompt = f"""Generate code to solve this GitHub issue:
+
+
+def write_prompt(analysis: Dict) -> Optional[str]:
+    """
+    Generate the golden prompt for one analysis.
+    
+    Returns:
+        Generated prompt, or None if the model call failed
+    """
+    print(f"  Creating prompt for: {analysis['issue_url'][:50]}...")
+    
+    # ✅ Fast 8B model for shorter outputs, 70B only if its prompt is malformed
+    return query_tiered("prompt", analysis, _prompt_request(analysis), max_tokens=600, temperature=0.6)
+
+
+async def write_prompt_async(
+    analysis: Dict,
+    on_token: Optional[TokenCallback] = None,
+    tier: Optional[str] = None
+) -> Optional[str]:
+    """Async version of write_prompt, routed across the providers of the given tier (small by default)."""
+    print(f"  Creating prompt for: {analysis['issue_url'][:50]}...")
+    
+    return await route(
+        tier or choose_tier(analysis, "prompt"),
+        _prompt_request(analysis),
+        max_tokens=600,
+        temperature=0.6,
+        on_token=on_token
+    )
+
+
+def _batch_prompt_request(analyses: List[Dict]) -> str:
+    """Build one prompt-writing request covering several analyses."""
+    entries = []
+    for i, analysis in enumerate(analyses):
+        inputs = budget_prompt_inputs("prompt", analysis["context"], analysis["solution_plan"])
+        entries.append({"id": str(i), "issue": inputs["context"], "solution_plan": inputs["plan"]})
+    
+    return f"""You are an expert at writing prompts for AI coding assistants.
+
+For EACH issue below, create a detailed, comprehensive coding prompt from its context and solution plan that includes:
+1. Clear problem description
+2. Technical requirements
+3. Expected code structure
+4. Testing requirements
+
+Each prompt must be complete enough for a developer to paste into ChatGPT/Claude.
+
+Issues:
+{batch_payload(entries)}
+
+{response_format("prompt")}"""
+
+
+async def write_prompts_batch_async(analyses: List[Dict]) -> Dict[str, str]:
+    """
+    Generate golden prompts for several analyses in one request.
+    
+    Returns:
+        Dictionary mapping issue_url to prompt, for the issues whose prompt
+        could be parsed and is well formed
+    """
+    print(f"  Creating {len(analyses)} prompts in one batched request...")
+    
+    response = await route(
+        "small",
+        _batch_prompt_request(analyses),
+        max_tokens=600 * len(analyses),
+        temperature=0.6
+    )
+    
+    prompts = parse_batch_response(response, [str(i) for i in range(len(analyses))], "prompt")
+    return {
+        analyses[int(i)]["issue_url"]: prompt
+        for i, prompt in prompts.items() if is_well_formed("prompt", prompt)
+    }
+
+
+def fallback_prompt(analysis: Dict) -> str:
+    """Template prompt used when the model call fails."""
+    context = analysis["context"][:900]
+    plan = analysis["solution_plan"][:700]
+    
+    return f"""Generate code to solve this GitHub issue:
 
 {context[:300]}
 
@@ -56,8 +125,19 @@ Follow this technical approach:
 {plan[:300]}
 
 Provide complete, production-ready code with documentation."""
-        
-        analysis["generated_prompt"] = generated_prompt
+
+
+def generate_prompt_agent(state: AgentState) -> Dict:
+    """
+    Create 'golden prompts' using Llama 3.1 8B.
+    Fast model optimized for structured, shorter outputs.
+    """
+    print("✨ Agent: Generating AI-ready prompts...")
+    
+    analyses = state.get("analyses", [])
+    
+    for analysis in analyses:
+        analysis["generated_prompt"] = write_prompt(analysis) or fallback_prompt(analysis)
     
     print("✅ Prompts generated")
     
@@ -4,33 +4,23 @@ Llama 3.3 70B provides the best quality for formal writing.
 """
 import os
 import uuid
-from typing import Dict
+from typing import Dict, Optional
 from docx import Document
 from graph.state import AgentState
-from utils.cerebras_client import query_cerebras
+from utils.llm_client import TokenCallback
+from utils.context_budget import budget_prompt_inputs
+from utils.llm_router import route
+from utils.model_tiering import choose_tier, query_tiered
 
 DOWNLOADS_DIR = "downloads"
 
 
-def draft_report_agent(state: AgentState) -> Dict:
-    """
-    Generate formal proposals using Llama 3.3 70B.
-    Largest model for highest quality formal writing.
-    """
-    print("📝 Agent: Drafting proposals...")
-    
-    analyses = state.get("analyses", [])
-    base_url = os.getenv("API_BASE_URL", "http://localhost:8000")
-    
-    os.makedirs(DOWNLOADS_DIR, exist_ok=True)
-    
-    downloads = []
+def _proposal_prompt(analysis: Dict) -> str:
+    """Build the proposal-drafting prompt for one analysis."""
+    inputs = budget_prompt_inputs("report", analysis["context"], analysis["solution_plan"])
+    context, plan = inputs["context"], inputs["plan"]
     
-    for analysis in analyses:
-        context = analysis["context"][:1000]
-        plan = analysis["solution_plan"][:800]
-        
-        prompt = f"""Write a formal, professional Google Summer of Code (GSOC) project proposal.
+    return f"""Write a formal, professional Google Summer of Code (GSOC) project proposal.
 
 **Issue Context:**
 {context}
@@ -50,18 +40,44 @@ Write a complete, well-structured proposal with:
 8. **About Me** (placeholder for contributor background)
 
 Use professional, formal tone. Be thorough and persuasive:"""
-        
-        print(f"  Drafting proposal for: {analysis['issue_url'][:50]}...")
-        
-        proposal_text = query_cerebras(
-            prompt, 
-            max_tokens=1200, 
-            temperature=0.6,
-            model="llama-3.3-70b"  # ✅ Best quality for formal writing
-        )
-        
-        if not proposal_text:
-            proposal_text = f"""# Google Summer of Code Project Proposal
+
+
+def write_proposal(analysis: Dict) -> Optional[str]:
+    """
+    Generate the proposal text for one analysis.
+    
+    Returns:
+        Proposal markdown, or None if the model call failed
+    """
+    print(f"  Drafting proposal for: {analysis['issue_url'][:50]}...")
+    
+    # ✅ 70B for formal writing, unless the issue is small enough for 8B
+    return query_tiered("report", analysis, _proposal_prompt(analysis), max_tokens=1200, temperature=0.6)
+
+
+async def write_proposal_async(
+    analysis: Dict,
+    on_token: Optional[TokenCallback] = None,
+    tier: Optional[str] = None
+) -> Optional[str]:
+    """Async version of write_proposal, routed across the providers of the issue's tier."""
+    print(f"  Drafting proposal for: {analysis['issue_url'][:50]}...")
+    
+    return await route(
+        tier or choose_tier(analysis, "report"),
+        _proposal_prompt(analysis),
+        max_tokens=1200,
+        temperature=0.6,
+        on_token=on_token
+    )
+
+
+def fallback_proposal(analysis: Dict) -> str:
+    """Template proposal used when the model call fails."""
+    context = analysis["context"][:1000]
+    plan = analysis["solution_plan"][:800]
+    
+    return f"""# Google Summer of Code Project Proposal
 
 ## Abstract
 This proposal addresses a critical feature request in the project.
@@ -85,43 +101,70 @@ This proposal addresses a critical feature request in the project.
 
 ## Benefits
 This contribution will significantly enhance the project's functionality and user experience."""
+
+
+def save_proposal(analysis: Dict, proposal_text: str) -> Dict:
+    """
+    Write a proposal to a .docx file in the downloads directory.
+    
+    Returns:
+        Download entry with issue_title and download_url
+    """
+    base_url = os.getenv("API_BASE_URL", "http://localhost:8000")
+    os.makedirs(DOWNLOADS_DIR, exist_ok=True)
+    
+    # Create .docx file
+    doc = Document()
+    doc.add_heading('Google Summer of Code Project Proposal', level=1)
+    
+    # Parse and format the proposal
+    for line in proposal_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
         
-        # Create .docx file
-        doc = Document()
-        doc.add_heading('Google Summer of Code Project Proposal', level=1)
-        
-        # Parse and format the proposal
-        for line in proposal_text.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line.startswith('###'):
-                doc.add_heading(line.replace('#', '').strip(), level=3)
-            elif line.startswith('##'):
-                doc.add_heading(line.replace('#', '').strip(), level=2)
-            elif line.startswith('#'):
-                doc.add_heading(line.replace('#', '').strip(), level=1)
-            elif line.startswith('**') and line.endswith('**'):
-                doc.add_heading(line.replace('**', ''), level=3)
-            else:
-                doc.add_paragraph(line)
-        
-        filename = f"proposal_{uuid.uuid4().hex[:8]}.docx"
-        filepath = os.path.join(DOWNLOADS_DIR, filename)
-        doc.save(filepath)
-        
-        issue_title = analysis["context"].split("\n")[0].replace("**Issue Title:** ", "")
-        downloads.append({
-            "issue_title": issue_title[:60],
-            "download_url": f"{base_url}/api/download/{filename}"
-        })
+        if line.startswith('###'):
+            doc.add_heading(line.replace('#', '').strip(), level=3)
+        elif line.startswith('##'):
+            doc.add_heading(line.replace('#', '').strip(), level=2)
+        elif line.startswith('#'):
+            doc.add_heading(line.replace('#', '').strip(), level=1)
+        elif line.startswith('**') and line.endswith('**'):
+            doc.add_heading(line.replace('**', ''), level=3)
+        else:
+            doc.add_paragraph(line)
+    
+    filename = f"proposal_{uuid.uuid4().hex[:8]}.docx"
+    filepath = os.path.join(DOWNLOADS_DIR, filename)
+    doc.save(filepath)
+    
+    issue_title = analysis["context"].split("\n")[0].replace("**Issue Title:** ", "")
+    return {
+        "issue_url": analysis["issue_url"],
+        "issue_title": issue_title[:60],
+        "download_url": f"{base_url}/api/download/{filename}"
+    }
+
+
+def draft_report_agent(state: AgentState) -> Dict:
+    """
+    Generate formal proposals using Llama 3.3 70B.
+    Largest model for highest quality formal writing.
+    """
+    print("📝 Agent: Drafting proposals...")
+    
+    analyses = state.get("analyses", [])
+    
+    downloads = []
+    
+    for analysis in analyses:
+        proposal_text = write_proposal(analysis) or fallback_proposal(analysis)
+        downloads.append(save_proposal(analysis, proposal_text))
     
     print(f"✅ {len(downloads)} proposals drafted")
     
+    # Analyses are left untouched: this node may run alongside generate_prompts
     return {
-        "analyses": analyses,  # ✅ Keep the analyses!
         "report_downloads": downloads,
         "current_step": "reports_ready"
     }
-
@@ -1,24 +1,23 @@
 """
-Agent: Generate technical solution plans using Cerebras Llama 3.3 70B.
+Agent: Generate technical solution plans using Cerebras Llama 3.3 70B
+(Llama 3.1 8B for small issues).
 """
-from typing import Dict
+from typing import Dict, List, Optional
 from graph.state import AgentState
-from utils.cerebras_client import query_cerebras
+from utils.llm_client import TokenCallback
+from utils.context_budget import budget_prompt_inputs
+from utils.llm_router import route
+from utils.model_tiering import choose_tier, query_tiered, is_well_formed
+from utils.batching import batch_payload, response_format, parse_batch_response
 
+SOLUTION_FALLBACK = "Unable to generate plan. AI service temporarily unavailable."
 
-def suggest_solution_agent(state: AgentState) -> Dict:
-    """
-    Generate step-by-step technical plans using Llama 3.3 70B.
-    This is Cerebras's most powerful available model.
-    """
-    print("🧠 Agent: Generating solution plans...")
-    
-    analyses = state.get("analyses", [])
+
+def _solution_prompt(analysis: Dict) -> str:
+    """Build the solution-plan prompt for one analysis."""
+    context = budget_prompt_inputs("solution", analysis["context"])["context"]
     
-    for analysis in analyses:
-        context = analysis["context"][:1500]
-        
-        prompt = f"""You are an expert software engineer analyzing a GitHub issue.
+    return f"""You are an expert software engineer analyzing a GitHub issue.
 
 Analyze this issue and provide a detailed, step-by-step solution plan:
 
@@ -31,20 +30,95 @@ Provide a numbered action plan (6-10 steps) with:
 - Testing approach
 
 Be thorough and technically precise:"""
-        
-        print(f"  Generating plan for: {analysis['issue_url'][:50]}...")
-        
-        solution_plan = query_cerebras(
-            prompt, 
-            max_tokens=800,
-            temperature=0.6,
-            model="llama-3.3-70b"  # ✅ Using available 70B model
-        )
-        
-        if not solution_plan:
-            solution_plan = "Unable to generate plan. AI service temporarily unavailable."
-        
-        analysis["solution_plan"] = solution_plan
+
+
+def plan_solution(analysis: Dict) -> Optional[str]:
+    """
+    Generate the solution plan for one analysis.
+    
+    Returns:
+        Solution plan, or None if the model call failed
+    """
+    print(f"  Generating plan for: {analysis['issue_url'][:50]}...")
+    
+    return query_tiered("solution", analysis, _solution_prompt(analysis), max_tokens=800, temperature=0.6)
+
+
+async def plan_solution_async(
+    analysis: Dict,
+    on_token: Optional[TokenCallback] = None,
+    tier: Optional[str] = None
+) -> Optional[str]:
+    """Async version of plan_solution, routed across the providers of the issue's tier."""
+    print(f"  Generating plan for: {analysis['issue_url'][:50]}...")
+    
+    return await route(
+        tier or choose_tier(analysis, "solution"),
+        _solution_prompt(analysis),
+        max_tokens=800,
+        temperature=0.6,
+        on_token=on_token
+    )
+
+
+def _batch_solution_prompt(analyses: List[Dict]) -> str:
+    """Build one solution-plan prompt covering several analyses."""
+    entries = [
+        {"id": str(i), "issue": budget_prompt_inputs("solution", analysis["context"])["context"]}
+        for i, analysis in enumerate(analyses)
+    ]
+    
+    return f"""You are an expert software engineer analyzing GitHub issues.
+
+For EACH issue below, provide a detailed, step-by-step solution plan: a numbered action plan (6-10 steps) with:
+- Specific files to modify
+- Technical implementation details
+- Code structure recommendations
+- Testing approach
+
+Issues:
+{batch_payload(entries)}
+
+{response_format("plan")}"""
+
+
+async def plan_solutions_batch_async(analyses: List[Dict]) -> Dict[str, str]:
+    """
+    Generate solution plans for several analyses in one request.
+    
+    Returns:
+        Dictionary mapping issue_url to plan, for the issues whose plan
+        could be parsed and is well formed
+    """
+    print(f"  Generating {len(analyses)} plans in one batched request...")
+    tier = "large" if any(choose_tier(analysis, "solution") == "large" for analysis in analyses) else "small"
+    
+    response = await route(
+        tier,
+        _batch_solution_prompt(analyses),
+        max_tokens=800 * len(analyses),
+        temperature=0.6
+    )
+    
+    plans = parse_batch_response(response, [str(i) for i in range(len(analyses))], "plan")
+    return {
+        analyses[int(i)]["issue_url"]: plan
+        for i, plan in plans.items() if is_well_formed("solution", plan)
+    }
+
+
+def suggest_solution_agent(state: AgentState) -> Dict:
+    """
+    Generate step-by-step technical plans using Llama 3.3 70B.
+    This is Cerebras's most powerful available model; small issues start
+    on Llama 3.1 8B and escalate if its plan is malformed.
+    """
+    print("🧠 Agent: Generating solution plans...")
+    
+    analyses = state.get("analyses", [])
+    
+    for analysis in analyses:
+        analysis["solution_plan"] = plan_solution(analysis) or SOLUTION_FALLBACK
     
     print("✅ Solution plans generated")
     
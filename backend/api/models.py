@@ -10,7 +10,9 @@ from pydantic import BaseModel, Field
 class SearchIssuesRequest(BaseModel):
     """Request to search for GitHub issues."""
     skills: List[str] = Field(..., min_items=1, max_items=10, description="Programming languages/frameworks")
-    max_results: int = Field(15, ge=1, le=50, description="Maximum number of issues to return")
+    # One search page (100 issues) per language keeps a request's fan-out
+    # within the search rate limit
+    max_results: int = Field(15, ge=1, le=100, description="Maximum number of issues to return")
     
     class Config:
         json_schema_extra = {
@@ -25,6 +27,7 @@ class AnalyzeIssuesRequest(BaseModel):
     """Request to analyze selected issues."""
     issue_urls: List[str] = Field(..., min_items=1, max_items=5, description="GitHub issue URLs to analyze")
     generate_reports: bool = Field(False, description="Whether to generate GSOC proposals")
+    batch_mode: bool = Field(False, description="Plan and prompt several issues per model request")
     
     class Config:
         json_schema_extra = {
@@ -68,6 +71,8 @@ class AnalyzeIssuesResponse(BaseModel):
     success: bool
     analyses: List[IssueAnalysis]
     report_downloads: List[Dict[str, str]] = []
+    job_id: Optional[str] = None  # Set when some stages fell back and the job can be resumed
+    incomplete_jobs: Dict[str, str] = {}  # issue_url -> job to resume it with (issues may span jobs)
     message: Optional[str] = None
 
 
@@ -85,6 +90,8 @@ class ProgressUpdate(BaseModel):
     stage: str  # "finding", "analyzing", "planning", "prompting", "reporting", "complete"
     message: str
     progress: int  # 0-100
+    issue_url: Optional[str] = None  # Issue the update belongs to
+    partial: Optional[str] = None  # Streamed model output since the previous update
     data: Optional[Dict[str, Any]] = None
 
 
@@ -2,9 +2,10 @@
 FastAPI routes for SourceSage API.
 """
 import os
-from typing import List
+import asyncio
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 from api.models import (
     SearchIssuesRequest, SearchIssuesResponse,
@@ -12,11 +13,33 @@ from api.models import (
     GitHubIssue, IssueAnalysis, ErrorResponse,
     ProgressUpdate, HealthResponse
 )
-from graph.async_workflow import run_issue_search_async, run_analysis_async
-from database.cache import cache_github_search, get_cached_search, cache_analysis, get_cached_analysis
+from graph.async_workflow import (
+    run_issue_search_async, run_analysis_async, run_reports_async, resume_analysis_async,
+    ProgressCallback
+)
+from utils.github_client import stream_good_first_issues, search_is_exhaustive
+from utils.admission import admission_metrics, new_request_scope
+from utils.resilience import breaker_states
+from utils.singleflight import SingleFlight
+from utils.skills import canonical_skills
+from database.cache import (
+    cache_github_search, get_cached_search, get_cached_language_sets, merge_issue_sets,
+    cache_analyses, get_cached_analyses
+)
 
 router = APIRouter(prefix="/api", tags=["api"])
 
+# Concurrent identical searches / per-issue analyses share one computation
+_search_flights = SingleFlight("search")
+_analysis_flights = SingleFlight("analysis")
+
+# Stale search cache entries being refreshed in the background (one task per key)
+_refreshing_searches = set()
+_refresh_tasks = set()
+
+# Led analyses that outlive a cancelled leader (see _analyze_coalesced)
+_analysis_tasks = set()
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -24,13 +47,22 @@ async def health_check():
     return HealthResponse(
         status="healthy",
         services={
-            "github": "✅" if os.getenv("GITHUB_TOKEN") else "❌",
+            "github": "✅" if os.getenv("GITHUB_TOKEN") or os.getenv("GITHUB_TOKENS") else "❌",
             "cerebras": "✅" if os.getenv("CEREBRAS_API_KEY") else "❌",
             "mongodb": "✅" if os.getenv("MONGODB_URL") else "⚠️ optional"
         }
     )
 
 
+@router.get("/metrics/llm")
+async def llm_metrics():
+    """LLM admission queue depth, in-flight calls, token usage and wait times per model."""
+    return {
+        "admission": admission_metrics(),
+        "circuit_breakers": breaker_states()
+    }
+
+
 @router.post("/search-issues", response_model=SearchIssuesResponse)
 async def search_issues(request: SearchIssuesRequest):
     """
@@ -40,19 +72,22 @@ async def search_issues(request: SearchIssuesRequest):
     """
     try:
         # Check cache first
-        cached = await get_cached_search(request.skills)
-        if cached:
+        cached = await get_cached_search(request.skills, min_results=request.max_results)
+        if cached and (len(cached["issues"]) >= request.max_results or cached["exhaustive"]):
+            # Serve stale entries immediately and refresh them in the background
+            _schedule_search_refresh(cached["stale"], request.max_results)
             return SearchIssuesResponse(
                 success=True,
-                issues=[GitHubIssue(**issue) for issue in cached[:request.max_results]],
-                total_found=len(cached),
+                issues=[GitHubIssue(**issue) for issue in cached["issues"][:request.max_results]],
+                total_found=len(cached["issues"]),
                 message="✅ Retrieved from cache"
             )
         
-        # Run workflow to find issues
-        result = await run_issue_search_async(request.skills)
-        
-        found_issues = result.get("found_issues", [])
+        # Run workflow to find issues (joining an identical search in flight)
+        search_key = (tuple(canonical_skills(request.skills)), request.max_results)
+        found_issues = await _search_flights.do(
+            search_key, lambda: _search_and_cache(request.skills, request.max_results)
+        )
         
         if not found_issues:
             return SearchIssuesResponse(
@@ -62,9 +97,6 @@ async def search_issues(request: SearchIssuesRequest):
                 message="No issues found for the given skills"
             )
         
-        # Cache results
-        await cache_github_search(request.skills, found_issues)
-        
         return SearchIssuesResponse(
             success=True,
             issues=[GitHubIssue(**issue) for issue in found_issues[:request.max_results]],
@@ -77,88 +109,329 @@ async def search_issues(request: SearchIssuesRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _search_and_cache(skills: List[str], max_results: int) -> List[dict]:
+    """
+    Search GitHub per language and cache each language's results.
+    
+    Languages with a cached result set of at least max_results issues (or
+    of every matching issue) are not searched again; the per-language sets
+    are unioned into the answer.
+    """
+    languages = canonical_skills(skills)
+    if not languages:
+        result = await run_issue_search_async(skills, max_results=max_results)
+        return result.get("found_issues", [])
+    
+    cached = await get_cached_language_sets(languages, min_results=max_results)
+    issue_sets = {language: entry["issues"] for language, entry in cached.items()}
+    missing = [language for language in languages if language not in issue_sets]
+    _schedule_search_refresh([[language] for language, entry in cached.items() if entry["stale"]], max_results)
+    
+    if missing:
+        print(f"🔍 Searching {len(missing)}/{len(languages)} language(s) not in cache: {missing}")
+        results = await asyncio.gather(*(
+            run_issue_search_async([language], max_results=max_results) for language in missing
+        ))
+        
+        for language, result in zip(missing, results):
+            found_issues = result.get("found_issues", [])
+            if found_issues:
+                await cache_github_search([language], found_issues, exhaustive=result.get("search_exhaustive", False))
+            issue_sets[language] = found_issues
+    
+    return merge_issue_sets([issue_sets[language] for language in languages])
+
+
+def _schedule_search_refresh(stale: List[List[str]], max_results: int):
+    """
+    Refresh stale search cache entries from GitHub in the background.
+    
+    At most one refresh runs per entry; entries already being refreshed
+    are skipped.
+    """
+    for languages in stale:
+        key = tuple(languages)
+        if key in _refreshing_searches:
+            continue
+        
+        _refreshing_searches.add(key)
+        task = asyncio.create_task(_refresh_search(languages, max_results))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+        task.add_done_callback(lambda _, key=key: _refreshing_searches.discard(key))
+
+
+async def _refresh_search(languages: List[str], max_results: int):
+    """Re-run a search and overwrite its cache entry."""
+    print(f"🔄 Refreshing stale search cache: {languages}")
+    try:
+        result = await run_issue_search_async(languages, max_results=max_results)
+        found_issues = result.get("found_issues", [])
+        if found_issues:
+            await cache_github_search(languages, found_issues, exhaustive=result.get("search_exhaustive", False))
+    except Exception as e:
+        print(f"⚠️ Search cache refresh failed for {languages}: {e}")
+
+
+@router.post("/search-issues/stream")
+async def search_issues_stream(request: SearchIssuesRequest):
+    """
+    Stream GitHub 'good first issues' as newline-delimited JSON.
+    
+    Each line is one issue, sent as soon as its search page arrives, up to
+    max_results issues in total. The merged result is cached once the
+    stream completes, unless it was cut short at max_results (arrival order
+    is not newest-first, so a cut-short stream is not the cached answer).
+    """
+    async def issue_lines():
+        found_issues = []
+        complete = True
+        total_counts = {}
+        stream = stream_good_first_issues(request.skills, request.max_results, total_counts)
+        
+        try:
+            async for issue in stream:
+                if len(found_issues) >= request.max_results:
+                    complete = False
+                    break
+                found_issues.append(issue)
+                yield GitHubIssue(**issue).model_dump_json() + "\n"
+        finally:
+            await stream.aclose()  # Cancel the searches still in flight
+        
+        if found_issues and complete:
+            found_issues.sort(key=lambda issue: issue.get("created_at") or "", reverse=True)
+            exhaustive = search_is_exhaustive(total_counts, request.skills, len(found_issues))
+            await cache_github_search(request.skills, found_issues, exhaustive=exhaustive)
+    
+    return StreamingResponse(issue_lines(), media_type="application/x-ndjson")
+
+
 @router.post("/analyze", response_model=AnalyzeIssuesResponse)
 async def analyze_issues(request: AnalyzeIssuesRequest):
     """Analyze selected issues and optionally generate GSOC proposals."""
     try:
+        return await _run_analyze(request)
+    
+    except Exception as e:
         print(f"\n{'='*60}")
-        print(f"📥 Analyze request:")
-        print(f"   URLs: {request.issue_urls}")
-        print(f"   Generate reports: {request.generate_reports}")
+        print(f"❌ Error: {e}")
         print(f"{'='*60}\n")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _run_analyze(
+    request: AnalyzeIssuesRequest,
+    progress: Optional[ProgressCallback] = None
+) -> AnalyzeIssuesResponse:
+    """
+    Analyze selected issues, serving cached analyses where possible.
+    
+    Shared by the REST endpoint and the WebSocket, which passes a progress
+    callback to receive stage updates and streamed model output.
+    """
+    # LLM calls of this request share one slot in the fair admission queue
+    new_request_scope()
+    
+    print(f"\n{'='*60}")
+    print(f"📥 Analyze request:")
+    print(f"   URLs: {request.issue_urls}")
+    print(f"   Generate reports: {request.generate_reports}")
+    print(f"{'='*60}\n")
+    
+    # Check the cache for all issues in one lookup
+    cached = await get_cached_analyses(request.issue_urls)
+    cached_analyses = []
+    uncached_urls = []
+    
+    for url in request.issue_urls:
+        if url in cached:
+            print(f"✅ Using cached analysis for: {url}")
+            cached_analyses.append(cached[url])
+        else:
+            uncached_urls.append(url)
+    
+    # Analyze uncached issues
+    report_downloads = []
+    incomplete_jobs = {}
+    
+    if uncached_urls:
+        print(f"🔄 Analyzing {len(uncached_urls)} new issue(s)...")
+        
+        result = await _analyze_coalesced(uncached_urls, request, progress)
         
-        # Check cache for each issue
-        cached_analyses = []
-        uncached_urls = []
+        new_analyses = result.get("analyses", [])
+        report_downloads = result.get("report_downloads", [])  # ✅ Get reports from result
         
-        for url in request.issue_urls:
-            cached = await get_cached_analysis(url)
-            if cached:
-                print(f"✅ Using cached analysis for: {url}")
-                cached_analyses.append(cached)
-            else:
-                uncached_urls.append(url)
+        incomplete_jobs = result.get("incomplete_jobs", {})
         
-        # Analyze uncached issues
-        report_downloads = []
+        all_analyses = cached_analyses + new_analyses
+    else:
+        # All from cache
+        all_analyses = cached_analyses
         
-        if uncached_urls:
-            print(f"🔄 Analyzing {len(uncached_urls)} new issue(s)...")
+        # If reports requested but we have cached data, we need to generate reports
+        if request.generate_reports and cached_analyses:
+            print("📝 Generating reports for cached analyses...")
             
+            # Generate reports (one concurrent task per issue)
+            result = await run_reports_async(cached_analyses, progress)
+            report_downloads = result.get("report_downloads", [])
+    
+    print(f"\n{'='*60}")
+    print(f"✅ Response: {len(all_analyses)} analyses, {len(report_downloads)} reports")
+    print(f"{'='*60}\n")
+    
+    return AnalyzeIssuesResponse(
+        success=True,
+        analyses=[IssueAnalysis(**analysis) for analysis in all_analyses],
+        report_downloads=report_downloads,
+        job_id=next(iter(incomplete_jobs.values()), None),
+        incomplete_jobs=incomplete_jobs,
+        message=_analysis_message(len(all_analyses), incomplete_jobs)
+    )
+
+
+async def _analyze_coalesced(
+    issue_urls: List[str],
+    request: AnalyzeIssuesRequest,
+    progress: Optional[ProgressCallback] = None
+) -> dict:
+    """
+    Run the analysis pipeline, sharing in-flight work per issue.
+    
+    Issues another request is already analysing with the same options are
+    awaited instead of analysed again; this request analyses the rest and
+    hands each issue's outcome to whoever joined it.
+    
+    Returns:
+        Pipeline-style result with analyses, report_downloads,
+        incomplete_issue_urls and incomplete_jobs (issue_url -> job_id;
+        joined issues belong to the jobs of the requests that led them)
+    """
+    keys = {url: (url, request.generate_reports) for url in issue_urls}
+    leading, joined = _analysis_flights.lead_or_join(list(keys.values()))
+    own_urls = [url for url in issue_urls if keys[url] in leading]
+    outcomes = {}
+    
+    async def lead() -> dict:
+        try:
             result = await run_analysis_async(
-                issue_urls=uncached_urls,
-                generate_reports=request.generate_reports
+                issue_urls=own_urls,
+                generate_reports=request.generate_reports,
+                progress=progress,
+                batch_mode=request.batch_mode
             )
             
             if result.get("error"):
-                raise Exception(result["error"])
-            
-            # Cache new analyses
-            for analysis in result.get("analyses", []):
-                await cache_analysis(analysis["issue_url"], analysis)
-            
-            new_analyses = result.get("analyses", [])
-            report_downloads = result.get("report_downloads", [])  # ✅ Get reports from result
-            
-            all_analyses = cached_analyses + new_analyses
-        else:
-            # All from cache
-            all_analyses = cached_analyses
+                raise Exception(f"{result['error']} (resume with POST /api/analyze/resume/{result['job_id']})")
             
-            # If reports requested but we have cached data, we need to generate reports
-            if request.generate_reports and cached_analyses:
-                print("📝 Generating reports for cached analyses...")
-                
-                # Import the report drafter
-                from agents.report_drafter import draft_report_agent
-                import asyncio
-                
-                # Create state with cached analyses
-                report_state = {
-                    "analyses": cached_analyses,
-                    "report_downloads": []
-                }
-                
-                # Generate reports
-                result = await asyncio.to_thread(draft_report_agent, report_state)
-                report_downloads = result.get("report_downloads", [])
+            # Cache new analyses (issues that fell back stay resumable instead)
+            await _cache_complete_analyses(result)
         
-        print(f"\n{'='*60}")
-        print(f"✅ Response: {len(all_analyses)} analyses, {len(report_downloads)} reports")
-        print(f"{'='*60}\n")
+        except BaseException as e:
+            error = e if isinstance(e, Exception) else RuntimeError("The analysis of this issue was cancelled")
+            for url in own_urls:
+                _analysis_flights.reject(keys[url], error)
+            raise
         
-        return AnalyzeIssuesResponse(
-            success=True,
-            analyses=[IssueAnalysis(**analysis) for analysis in all_analyses],
-            report_downloads=report_downloads,
-            message=f"✅ Analyzed {len(all_analyses)} issues"
-        )
+        downloads = {download.get("issue_url"): download for download in result.get("report_downloads", [])}
+        incomplete = set(result.get("incomplete_issue_urls", []))
+        led = {}
+        
+        for analysis in result.get("analyses", []):
+            url = analysis["issue_url"]
+            led[url] = {
+                "analysis": analysis,
+                "download": downloads.get(url),
+                "job_id": result["job_id"] if url in incomplete else None
+            }
+        
+        for url in own_urls:
+            _analysis_flights.resolve(keys[url], led.get(url))
+        return led
+    
+    if own_urls:
+        # Shielded so this request going away does not fail the requests that
+        # joined its issues; the run finishes (and checkpoints) in the background
+        task = asyncio.create_task(lead())
+        _analysis_tasks.add(task)
+        task.add_done_callback(_analysis_tasks.discard)
+        outcomes.update(await asyncio.shield(task))
+    
+    for (url, _), flight in joined.items():
+        print(f"🔗 Joining in-flight analysis: {url}")
+        outcome = await asyncio.shield(flight)
+        if outcome:
+            outcomes[url] = outcome
+    
+    ordered = [outcomes[url] for url in issue_urls if url in outcomes]
+    incomplete_jobs = {outcome["analysis"]["issue_url"]: outcome["job_id"] for outcome in ordered if outcome["job_id"]}
+    
+    return {
+        "analyses": [outcome["analysis"] for outcome in ordered],
+        "report_downloads": [outcome["download"] for outcome in ordered if outcome["download"]],
+        "incomplete_issue_urls": list(incomplete_jobs),
+        "incomplete_jobs": incomplete_jobs
+    }
+
+
+@router.post("/analyze/resume/{job_id}", response_model=AnalyzeIssuesResponse)
+async def resume_analysis(job_id: str):
+    """
+    Resume a checkpointed analysis job from each issue's last completed stage.
     
+    Jobs are returned in incomplete_jobs by /api/analyze when some stages fell back,
+    or named in its error message when the pipeline failed.
+    """
+    try:
+        new_request_scope()
+        result = await resume_analysis_async(job_id)
     except Exception as e:
-        print(f"\n{'='*60}")
-        print(f"❌ Error: {e}")
-        print(f"{'='*60}\n")
+        print(f"❌ Resume error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    if result.get("busy"):
+        raise HTTPException(status_code=409, detail=result["error"])
+    
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    
+    await _cache_complete_analyses(result)
+    
+    analyses = result.get("analyses", [])
+    incomplete_jobs = {url: job_id for url in result.get("incomplete_issue_urls", [])}
+    
+    return AnalyzeIssuesResponse(
+        success=True,
+        analyses=[IssueAnalysis(**analysis) for analysis in analyses],
+        report_downloads=result.get("report_downloads", []),
+        job_id=job_id if incomplete_jobs else None,
+        incomplete_jobs=incomplete_jobs,
+        message=_analysis_message(len(analyses), incomplete_jobs)
+    )
+
+
+async def _cache_complete_analyses(result: dict):
+    """Cache the analyses whose stages all completed without fallback."""
+    incomplete = set(result.get("incomplete_issue_urls", []))
+    
+    await cache_analyses([
+        analysis for analysis in result.get("analyses", [])
+        if analysis["issue_url"] not in incomplete
+    ])
+
+
+def _analysis_message(count: int, incomplete_jobs: Dict[str, str]) -> str:
+    """Response message, pointing at the resume API for every incomplete job."""
+    job_ids = list(dict.fromkeys(incomplete_jobs.values()))
+    if job_ids:
+        resume = ", ".join(f"POST /api/analyze/resume/{job_id}" for job_id in job_ids)
+        return f"⚠️ Analyzed {count} issues; some stages used fallback output (resume with {resume})"
+    return f"✅ Analyzed {count} issues"
 
 
 
@@ -180,8 +453,33 @@ async def download_proposal(filename: str):
 # WebSocket for real-time progress
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time progress updates."""
+    """
+    WebSocket endpoint for real-time progress updates.
+    
+    Send {"type": "analyze", "issue_urls": [...], "generate_reports": bool}
+    to run an analysis; every stage change and streamed model delta comes
+    back as a ProgressUpdate, ending with a "complete" update carrying the
+    AnalyzeIssuesResponse (or an "error" message).
+    """
     await websocket.accept()
+    send_lock = asyncio.Lock()
+    connected = True
+    
+    async def send(message: dict):
+        nonlocal connected
+        if not connected:
+            return
+        
+        # Updates from concurrently running issues must not interleave
+        async with send_lock:
+            try:
+                await websocket.send_json(message)
+            except Exception:
+                # Client went away: keep the pipeline (and its checkpoints) running
+                connected = False
+    
+    async def progress(update: dict):
+        await send({"type": "progress", **ProgressUpdate(**update).model_dump(exclude_none=True)})
     
     try:
         while True:
@@ -190,7 +488,25 @@ async def websocket_endpoint(websocket: WebSocket):
             if data.get("type") == "ping":
                 await websocket.send_json({"type": "pong"})
             
-            # Add more WebSocket handling as needed
+            elif data.get("type") == "analyze":
+                try:
+                    request = AnalyzeIssuesRequest(
+                        issue_urls=data.get("issue_urls", []),
+                        generate_reports=data.get("generate_reports", False),
+                        batch_mode=data.get("batch_mode", False)
+                    )
+                    response = await _run_analyze(request, progress)
+                except Exception as e:
+                    print(f"❌ WebSocket analyze error: {e}")
+                    await send({"type": "error", "error": str(e)})
+                    continue
+                
+                await progress({
+                    "stage": "complete",
+                    "message": response.message or "",
+                    "progress": 100,
+                    "data": response.model_dump()
+                })
     
     except WebSocketDisconnect:
         print("WebSocket disconnected")
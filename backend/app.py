@@ -10,6 +10,9 @@ import os
 
 from api.routes import router
 from database.connection import db_manager
+from database.indexes import bootstrap_indexes
+from utils.github_http import close_github_client
+from utils.llm_client import close_llm_clients
 
 
 @asynccontextmanager
@@ -23,6 +26,7 @@ async def lifespan(app: FastAPI):
     
     # Connect to MongoDB
     await db_manager.connect()
+    await bootstrap_indexes()
     
     # Create downloads directory if it doesn't exist
     os.makedirs("downloads", exist_ok=True)
@@ -34,6 +38,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down SourceSage API...")
+    await close_github_client()
+    await close_llm_clients()
     await db_manager.disconnect()
     print("👋 Goodbye!")
 
@@ -75,7 +81,10 @@ async def root():
         "endpoints": {
             "health": "/api/health",
             "search": "/api/search-issues",
+            "search_stream": "/api/search-issues/stream",
             "analyze": "/api/analyze",
+            "resume": "/api/analyze/resume/{job_id}",
+            "llm_metrics": "/api/metrics/llm",
             "download": "/api/download/{filename}",
             "websocket": "/api/ws"
         }
@@ -1,33 +1,101 @@
 """
 Cache operations for GitHub issues and analyses.
+
+Reads go through a bounded in-process LRU tier before MongoDB, which stays
+the shared source of truth. The local tier is filled on Mongo hits and on
+writes, and its entries live at most CACHE_MEMORY_TTL_SECONDS (and never
+past the Mongo expiry) so other workers' writes are picked up quickly.
+
+Search entries are stale-while-revalidate: past their soft TTL they are
+still served, flagged stale so the caller can refresh them in the
+background, until the hard TTL when MongoDB's TTL index deletes them.
 """
+import os
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from utils.lru_cache import LRUCache
+from utils.skills import canonical_skills, skills_key
 from .connection import get_db
 
+CACHE_MEMORY_TTL_SECONDS = float(os.getenv("CACHE_MEMORY_TTL_SECONDS", "300"))
+
+# Search results are fresh for the soft TTL and served stale until the hard TTL
+SEARCH_SOFT_TTL_HOURS = float(os.getenv("SEARCH_CACHE_SOFT_TTL_HOURS", "24"))
+SEARCH_HARD_TTL_HOURS = float(os.getenv("SEARCH_CACHE_HARD_TTL_HOURS", "168"))
+
+_search_memory = LRUCache(
+    maxsize=int(os.getenv("CACHE_MEMORY_SEARCH_ENTRIES", "256")),
+    ttl_seconds=CACHE_MEMORY_TTL_SECONDS,
+    max_bytes=int(os.getenv("CACHE_MEMORY_SEARCH_BYTES", str(32 * 1024 * 1024)))
+)
+_analysis_memory = LRUCache(
+    maxsize=int(os.getenv("CACHE_MEMORY_ANALYSIS_ENTRIES", "1024")),
+    ttl_seconds=CACHE_MEMORY_TTL_SECONDS,
+    max_bytes=int(os.getenv("CACHE_MEMORY_ANALYSIS_BYTES", str(64 * 1024 * 1024)))
+)
+
+
+def _memory_ttl(expires_at: Optional[datetime]) -> float:
+    """Local TTL for a Mongo entry: the memory TTL, capped by its expiry."""
+    if expires_at is None:
+        return CACHE_MEMORY_TTL_SECONDS
+    remaining = (expires_at - datetime.utcnow()).total_seconds()
+    return max(0.0, min(CACHE_MEMORY_TTL_SECONDS, remaining))
+
+
+def merge_issue_sets(issue_sets: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Union search result sets, de-duplicated by URL, newest first."""
+    merged = {}
+    for issues in issue_sets:
+        for issue in issues:
+            merged.setdefault(issue["url"], issue)
+    
+    return sorted(merged.values(), key=lambda issue: issue.get("created_at") or "", reverse=True)
+
 
 async def cache_github_search(
     skills: List[str],
     issues: List[Dict[str, Any]],
-    ttl_hours: int = 24
+    ttl_hours: float = SEARCH_SOFT_TTL_HOURS,
+    hard_ttl_hours: float = SEARCH_HARD_TTL_HOURS,
+    exhaustive: bool = False
 ) -> bool:
-    """Cache GitHub search results."""
+    """
+    Cache GitHub search results under the canonical key of the skills.
+    
+    Results of a single-language search double as that language's result
+    set, from which multi-skill queries are composed. Entries are fresh for
+    ttl_hours and served stale until hard_ttl_hours. An exhaustive entry
+    holds every matching issue, so it answers requests for more results
+    than it has.
+    """
+    cache_key = skills_key(skills)
+    now = datetime.utcnow()
+    stale_at = now + timedelta(hours=ttl_hours)
+    expires_at = now + timedelta(hours=max(ttl_hours, hard_ttl_hours))
+    
+    _search_memory.set(
+        cache_key,
+        {"issues": list(issues), "stale_at": stale_at, "exhaustive": exhaustive},
+        ttl_seconds=_memory_ttl(expires_at)
+    )
+    
     try:
         db = await get_db()
         if db is None:  # ✅ Fixed: Check against None explicitly
             return False
         
-        cache_key = "_".join(sorted(skills))
-        expires_at = datetime.utcnow() + timedelta(hours=ttl_hours)
-        
         await db.issues_cache.update_one(
             {"cache_key": cache_key},
             {
                 "$set": {
-                    "skills": skills,
+                    "skills": canonical_skills(skills),
                     "issues": issues,
-                    "cached_at": datetime.utcnow(),
-                    "expires_at": expires_at
+                    "cached_at": now,
+                    "stale_at": stale_at,
+                    "expires_at": expires_at,
+                    "exhaustive": exhaustive
                 }
             },
             upsert=True
@@ -40,29 +108,118 @@ async def cache_github_search(
         return False
 
 
-async def get_cached_search(skills: List[str]) -> Optional[List[Dict[str, Any]]]:
-    """Get cached GitHub search results."""
+def _search_entry(cached: Dict[str, Any]) -> Dict[str, Any]:
+    stale_at = cached["stale_at"]
+    return {
+        "issues": list(cached["issues"]),
+        "stale": stale_at is not None and stale_at <= datetime.utcnow(),
+        "exhaustive": cached["exhaustive"]
+    }
+
+
+async def _get_search_entries(cache_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up search cache entries, in-process first, then in one Mongo query.
+    
+    Returns:
+        Dictionary mapping cache key to {issues, stale, exhaustive}
+    """
+    found = {}
+    for cache_key in cache_keys:
+        cached = _search_memory.get(cache_key)
+        if cached is not None:
+            found[cache_key] = _search_entry(cached)
+    
+    remaining = [cache_key for cache_key in cache_keys if cache_key not in found]
+    if not remaining:
+        return found
+    
     try:
         db = await get_db()
         if db is None:  # ✅ Fixed
-            return None
-        
-        cache_key = "_".join(sorted(skills))
+            return found
         
-        result = await db.issues_cache.find_one({
-            "cache_key": cache_key,
+        cursor = db.issues_cache.find({
+            "cache_key": {"$in": remaining},
             "expires_at": {"$gt": datetime.utcnow()}
         })
         
-        if result:
-            print(f"✅ Cache hit for: {skills}")
-            return result.get("issues")
+        async for result in cursor:
+            issues = result.get("issues")
+            if issues is None:
+                continue
+            
+            # Entries written before soft TTLs existed stay fresh until expiry
+            cached = {
+                "issues": list(issues),
+                "stale_at": result.get("stale_at", result.get("expires_at")),
+                "exhaustive": result.get("exhaustive", False)
+            }
+            _search_memory.set(result["cache_key"], cached, ttl_seconds=_memory_ttl(result.get("expires_at")))
+            found[result["cache_key"]] = _search_entry(cached)
         
-        return None
+        return found
     
     except Exception as e:
         print(f"⚠️ Cache read failed: {e}")
-        return None
+        return found
+
+
+def _covers(entry: Dict[str, Any], min_results: int) -> bool:
+    """Whether a cached entry can answer a request for min_results issues."""
+    return len(entry["issues"]) >= min_results or entry["exhaustive"]
+
+
+async def get_cached_language_sets(languages: List[str], min_results: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the cached per-language result sets that cover min_results issues
+    (they have that many, or every matching issue).
+    
+    Returns:
+        Dictionary mapping language to {issues, stale, exhaustive}
+    """
+    entries = await _get_search_entries(languages)
+    return {language: entry for language, entry in entries.items() if _covers(entry, min_results)}
+
+
+async def get_cached_search(skills: List[str], min_results: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    Get cached GitHub search results.
+    
+    Skills are canonicalized first, so equivalent skill lists share an
+    entry. Without an entry for the exact language set, a multi-language
+    query is answered by the union of the cached per-language result sets
+    when every language has one covering min_results issues.
+    
+    Returns:
+        {issues, stale, exhaustive} where stale lists the skill sets
+        (canonical language lists) whose entries are past their soft TTL and
+        should be refreshed, and exhaustive tells whether issues holds every
+        matching issue; or None on a miss
+    """
+    languages = canonical_skills(skills)
+    cache_key = skills_key(skills)
+    entries = await _get_search_entries([cache_key] + (languages if len(languages) > 1 else []))
+    
+    if cache_key in entries:
+        entry = entries[cache_key]
+        print(f"✅ Cache hit for: {languages}{' (stale)' if entry['stale'] else ''}")
+        return {
+            "issues": entry["issues"],
+            "stale": [languages] if entry["stale"] else [],
+            "exhaustive": entry["exhaustive"]
+        }
+    
+    if len(languages) > 1 and all(language in entries and _covers(entries[language], min_results) for language in languages):
+        stale = [[language] for language in languages if entries[language]["stale"]]
+        print(f"✅ Cache hit for: {languages} (composed per language{', stale' if stale else ''})")
+        return {
+            "issues": merge_issue_sets([entries[language]["issues"] for language in languages]),
+            "stale": stale,
+            "exhaustive": all(entries[language]["exhaustive"] for language in languages)
+        }
+    
+    return None
 
 
 async def cache_analysis(
@@ -71,6 +228,8 @@ async def cache_analysis(
     ttl_hours: int = 168
 ) -> bool:
     """Cache issue analysis."""
+    _analysis_memory.set(issue_url, dict(analysis), ttl_seconds=min(CACHE_MEMORY_TTL_SECONDS, ttl_hours * 3600))
+    
     try:
         db = await get_db()
         if db is None:  # ✅ Fixed
@@ -99,6 +258,10 @@ async def cache_analysis(
 
 async def get_cached_analysis(issue_url: str) -> Optional[Dict[str, Any]]:
     """Get cached analysis."""
+    analysis = _analysis_memory.get(issue_url)
+    if analysis is not None:
+        return dict(analysis)
+    
     try:
         db = await get_db()
         if db is None:  # ✅ Fixed
@@ -111,10 +274,94 @@ async def get_cached_analysis(issue_url: str) -> Optional[Dict[str, Any]]:
         
         if result:
             print(f"✅ Analysis cache hit for: {issue_url}")
-            return result.get("analysis")
+            analysis = result.get("analysis")
+            if analysis is not None:
+                _analysis_memory.set(issue_url, dict(analysis), ttl_seconds=_memory_ttl(result.get("expires_at")))
+            return analysis
         
         return None
     
     except Exception as e:
         print(f"⚠️ Analysis cache read failed: {e}")
         return None
+
+
+async def get_cached_analyses(issue_urls: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get cached analyses for several issues in one lookup.
+    
+    Returns:
+        Dictionary mapping issue_url to analysis for the URLs that were cached
+    """
+    found = {}
+    for url in issue_urls:
+        analysis = _analysis_memory.get(url)
+        if analysis is not None:
+            found[url] = dict(analysis)
+    
+    remaining = [url for url in dict.fromkeys(issue_urls) if url not in found]
+    if not remaining:
+        return found
+    
+    try:
+        db = await get_db()
+        if db is None:
+            return found
+        
+        cursor = db.analyses_cache.find({
+            "issue_url": {"$in": remaining},
+            "expires_at": {"$gt": datetime.utcnow()}
+        })
+        
+        async for result in cursor:
+            analysis = result.get("analysis")
+            if analysis is not None:
+                _analysis_memory.set(result["issue_url"], dict(analysis), ttl_seconds=_memory_ttl(result.get("expires_at")))
+                found[result["issue_url"]] = analysis
+        
+        return found
+    
+    except Exception as e:
+        print(f"⚠️ Analysis cache read failed: {e}")
+        return found
+
+
+async def cache_analyses(
+    analyses: List[Dict[str, Any]],
+    ttl_hours: int = 168
+) -> bool:
+    """Cache several issue analyses (keyed by their issue_url) in one bulk write."""
+    if not analyses:
+        return True
+    
+    for analysis in analyses:
+        _analysis_memory.set(analysis["issue_url"], dict(analysis), ttl_seconds=min(CACHE_MEMORY_TTL_SECONDS, ttl_hours * 3600))
+    
+    try:
+        db = await get_db()
+        if db is None:
+            return False
+        
+        now = datetime.utcnow()
+        expires_at = now + timedelta(hours=ttl_hours)
+        
+        await db.analyses_cache.bulk_write([
+            UpdateOne(
+                {"issue_url": analysis["issue_url"]},
+                {
+                    "$set": {
+                        "analysis": analysis,
+                        "cached_at": now,
+                        "expires_at": expires_at
+                    }
+                },
+                upsert=True
+            )
+            for analysis in analyses
+        ], ordered=False)
+        
+        return True
+    
+    except Exception as e:
+        print(f"⚠️ Analysis cache write failed: {e}")
+        return False
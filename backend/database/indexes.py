@@ -0,0 +1,112 @@
+"""
+Index bootstrap for the MongoDB collections.
+
+Every collection gets a unique index on the key it is looked up by, and
+collections with an expires_at field get a TTL index on it so MongoDB
+deletes expired documents in the background.
+"""
+from typing import Dict, List, Any
+from .connection import get_db
+
+# collection -> [(index name, keys, options)]
+INDEX_SPECS: Dict[str, List[tuple]] = {
+    "issues_cache": [
+        ("cache_key_unique", [("cache_key", 1)], {"unique": True}),
+        ("expires_at_ttl", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+    "analyses_cache": [
+        ("issue_url_unique", [("issue_url", 1)], {"unique": True}),
+        ("expires_at_ttl", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+    "llm_cache": [
+        ("key_unique", [("key", 1)], {"unique": True}),
+        ("expires_at_ttl", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+    "github_validators": [
+        ("url_unique", [("url", 1)], {"unique": True}),
+    ],
+    "workflow_jobs": [
+        ("job_id_unique", [("job_id", 1)], {"unique": True}),
+        ("request_key", [("request_key", 1)], {}),
+        ("expires_at_ttl", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+    "workflow_checkpoints": [
+        ("job_issue_unique", [("job_id", 1), ("issue_url", 1)], {"unique": True}),
+        ("expires_at_ttl", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+}
+
+
+async def ensure_indexes() -> bool:
+    """
+    Create any missing indexes from INDEX_SPECS.
+    
+    Creating an index that already exists is a no-op. A failure on one index
+    (e.g. duplicate keys blocking a unique index) is reported and does not
+    stop the others.
+    
+    Returns:
+        True if every index exists afterwards
+    """
+    db = await get_db()
+    if db is None:
+        return False
+    
+    ok = True
+    for collection, specs in INDEX_SPECS.items():
+        for name, keys, options in specs:
+            try:
+                await db[collection].create_index(keys, name=name, **options)
+            except Exception as e:
+                print(f"⚠️ Index {collection}.{name} could not be created: {e}")
+                ok = False
+    return ok
+
+
+async def missing_indexes() -> Dict[str, List[str]]:
+    """
+    Check the database against INDEX_SPECS.
+    
+    An index counts as present when one with the same keys (and unique /
+    TTL options) exists, whatever its name.
+    
+    Returns:
+        Dictionary mapping collection name to its missing index names
+    """
+    db = await get_db()
+    if db is None:
+        return {}
+    
+    missing = {}
+    for collection, specs in INDEX_SPECS.items():
+        try:
+            existing = list((await db[collection].index_information()).values())
+        except Exception as e:
+            print(f"⚠️ Could not list indexes of {collection}: {e}")
+            existing = []
+        
+        absent = [name for name, keys, options in specs if not any(_matches(info, keys, options) for info in existing)]
+        if absent:
+            missing[collection] = absent
+    return missing
+
+
+def _matches(info: Dict[str, Any], keys: List[tuple], options: Dict[str, Any]) -> bool:
+    """Whether an index_information() entry satisfies a spec."""
+    if [(field, int(direction)) for field, direction in info.get("key", [])] != keys:
+        return False
+    return all(info.get(option) == value for option, value in options.items())
+
+
+async def bootstrap_indexes():
+    """Ensure the indexes at startup and report any that are still missing."""
+    if await get_db() is None:
+        return
+    
+    await ensure_indexes()
+    missing = await missing_indexes()
+    if missing:
+        for collection, names in missing.items():
+            print(f"⚠️ Missing indexes on {collection}: {', '.join(names)}")
+    else:
+        print("✅ MongoDB indexes in place")
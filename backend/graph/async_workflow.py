@@ -1,13 +1,76 @@
 """
-Async wrapper for running agents sequentially.
+Async pipeline running each issue through the agent stages concurrently.
 """
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+from graph.checkpoints import checkpoint_store, new_job_id
+from utils.concurrency import stage_semaphore
+from utils.issue_resolver import resolve_issues
+from utils.model_tiering import choose_tier, is_well_formed
+from utils.batching import batch_chunks
 
+# Async callback receiving progress updates (ProgressUpdate fields as a dict)
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
 
-async def run_issue_search_async(skills: list) -> Dict[str, Any]:
+# Overall progress reported for each stage
+STAGE_PROGRESS = {
+    "analyzing": 10,
+    "planning": 30,
+    "prompting": 60,
+    "reporting": 80,
+    "complete": 100,
+}
+
+
+async def _notify(progress: Optional[ProgressCallback], stage: str, message: str, **fields):
+    """Send a progress update, if anyone is listening."""
+    if progress is not None:
+        await progress({"stage": stage, "message": message, "progress": STAGE_PROGRESS[stage], **fields})
+
+
+def _token_sink(progress: Optional[ProgressCallback], stage: str, issue_url: str):
+    """Build an on_token callback forwarding streamed text as progress updates."""
+    if progress is None:
+        return None
+    
+    async def on_token(delta: str, restart: bool = False):
+        if restart:
+            await _notify(progress, stage, "Switching to another model", issue_url=issue_url, data={"restart": True})
+        await _notify(progress, stage, "Streaming", issue_url=issue_url, partial=delta)
+    
+    return on_token
+
+
+async def _generate_tiered(
+    stage: str,
+    progress_stage: str,
+    analysis: Dict[str, Any],
+    generate_fn: Callable[..., Awaitable[Optional[str]]],
+    progress: Optional[ProgressCallback] = None
+) -> Optional[str]:
+    """
+    Run a stage on the issue's model tier.
+    
+    Small-model output that fails the stage's quality check is regenerated
+    on the large tier; listeners are told to discard the streamed text.
+    """
+    issue_url = analysis["issue_url"]
+    tier = choose_tier(analysis, stage)
+    on_token = _token_sink(progress, progress_stage, issue_url)
+    
+    result = await generate_fn(analysis, on_token=on_token, tier=tier)
+    
+    if tier == "small" and not is_well_formed(stage, result):
+        print(f"  ↗️ Small-model {stage} output malformed, retrying on the large tier")
+        await _notify(progress, progress_stage, "Retrying on a larger model", issue_url=issue_url, data={"restart": True})
+        result = await generate_fn(analysis, on_token=on_token, tier="large")
+    
+    return result
+
+
+async def run_issue_search_async(skills: list, max_results: int = 15) -> Dict[str, Any]:
     """Run only issue search."""
-    from agents.issue_finder import find_issues_agent
+    from agents.issue_finder import find_issues_agent_async
     
     state = {
         "skills": skills,
@@ -19,82 +82,312 @@ async def run_issue_search_async(skills: list) -> Dict[str, Any]:
         "error": None
     }
     
-    result = await asyncio.to_thread(find_issues_agent, state)
+    result = await find_issues_agent_async(state, max_results=max_results)
     return result
 
 
+async def _run_issue_pipeline(
+    analysis: Dict[str, Any],
+    generate_reports: bool,
+    job_id: Optional[str] = None,
+    checkpoint: Optional[Dict[str, Any]] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, str]], bool]:
+    """
+    Run the LLM stages for a single issue.
+    
+    Every stage holds a slot of its process-wide stage semaphore, so
+    concurrent issues and requests share a bounded number of model calls.
+    Stages already recorded in the issue's checkpoint are skipped, and each
+    stage that succeeds is checkpointed. Stages that fell back to template
+    output are not, so a resume retries them. Model output is streamed to
+    progress (when given) as it is generated.
+    
+    Returns:
+        Tuple of the analysis, its report download (if drafted), and
+        whether every requested stage completed
+    """
+    completed = list(checkpoint["completed"]) if checkpoint else ["analysis"]
+    download = checkpoint.get("download") if checkpoint else None
+    
+    if "solution" not in completed and await _plan_issue_solution(analysis, progress):
+        completed.append("solution")
+        if job_id:
+            await checkpoint_store.save(job_id, analysis, completed, download)
+    
+    # Without a real plan, later stages use their templates instead of paying
+    # for model calls whose output would be thrown away on resume anyway
+    plan_ok = "solution" in completed
+    
+    # Prompt and proposal both depend only on context + plan: run them side by side
+    stages = []
+    if "prompt" not in completed:
+        stages.append(("prompt", _generate_issue_prompt(analysis, progress, use_model=plan_ok)))
+    if generate_reports and "report" not in completed:
+        stages.append(("report", _draft_issue_report(analysis, progress, use_model=plan_ok)))
+    
+    results = await asyncio.gather(*(coro for _, coro in stages), return_exceptions=True)
+    
+    error = None
+    for (stage, _), result in zip(stages, results):
+        if isinstance(result, Exception):
+            error = error or result
+            continue
+        
+        if stage == "report":
+            download, ok = result
+        else:
+            ok = result
+        
+        if ok and plan_ok:
+            completed.append(stage)
+    
+    if job_id and stages:
+        await checkpoint_store.save(job_id, analysis, completed, download)
+    
+    if error:
+        raise error
+    
+    required = ["analysis", "solution", "prompt"] + (["report"] if generate_reports else [])
+    return analysis, download, all(stage in completed for stage in required)
+
+
+async def _plan_issue_solution(analysis: Dict[str, Any], progress: Optional[ProgressCallback] = None) -> bool:
+    """Generate the solution plan for a single issue; False if it fell back."""
+    from agents.solution_suggester import plan_solution_async, SOLUTION_FALLBACK
+    
+    issue_url = analysis["issue_url"]
+    async with stage_semaphore("solution"):
+        await _notify(progress, "planning", "Planning solution", issue_url=issue_url)
+        solution_plan = await _generate_tiered("solution", "planning", analysis, plan_solution_async, progress)
+    
+    analysis["solution_plan"] = solution_plan or SOLUTION_FALLBACK
+    await _notify(
+        progress, "planning", "Solution plan ready" if solution_plan else "Solution plan fell back to template",
+        issue_url=issue_url, data={"solution_plan": analysis["solution_plan"]}
+    )
+    return bool(solution_plan)
+
+
+async def _generate_issue_prompt(
+    analysis: Dict[str, Any],
+    progress: Optional[ProgressCallback] = None,
+    use_model: bool = True
+) -> bool:
+    """Generate the golden prompt for a single issue (the template without use_model); False if it fell back."""
+    from agents.prompt_generator import write_prompt_async, fallback_prompt
+    
+    issue_url = analysis["issue_url"]
+    generated_prompt = None
+    if use_model:
+        async with stage_semaphore("prompt"):
+            await _notify(progress, "prompting", "Writing prompt", issue_url=issue_url)
+            generated_prompt = await _generate_tiered("prompt", "prompting", analysis, write_prompt_async, progress)
+    
+    analysis["generated_prompt"] = generated_prompt or fallback_prompt(analysis)
+    await _notify(
+        progress, "prompting", "Prompt ready" if generated_prompt else "Prompt fell back to template",
+        issue_url=issue_url, data={"generated_prompt": analysis["generated_prompt"]}
+    )
+    return bool(generated_prompt)
+
+
+async def _draft_issue_report(
+    analysis: Dict[str, Any],
+    progress: Optional[ProgressCallback] = None,
+    use_model: bool = True
+) -> Tuple[Dict[str, str], bool]:
+    """Draft and save the proposal for a single issue (the template without use_model); False if it fell back."""
+    from agents.report_drafter import write_proposal_async, fallback_proposal, save_proposal
+    
+    issue_url = analysis["issue_url"]
+    proposal_text = None
+    if use_model:
+        async with stage_semaphore("report"):
+            await _notify(progress, "reporting", "Drafting proposal", issue_url=issue_url)
+            proposal_text = await _generate_tiered("report", "reporting", analysis, write_proposal_async, progress)
+    
+    download = await asyncio.to_thread(
+        save_proposal, analysis, proposal_text or fallback_proposal(analysis)
+    )
+    await _notify(
+        progress, "reporting", "Proposal ready" if proposal_text else "Proposal fell back to template",
+        issue_url=issue_url, data={"download": download}
+    )
+    return download, bool(proposal_text)
+
+
+async def _run_batched_stages(
+    analyses: list,
+    checkpoints: Dict[str, Dict[str, Any]],
+    job_id: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Batched mode: plan and then prompt several issues per model request.
+    
+    Issues a batch did not answer (or answered badly) are left for the
+    per-issue pipeline, which retries them with single-issue calls.
+    
+    Returns:
+        Checkpoints by issue_url with the batched stages marked completed
+    """
+    from agents.solution_suggester import plan_solutions_batch_async
+    from agents.prompt_generator import write_prompts_batch_async
+    
+    checkpoints = {
+        analysis["issue_url"]: {
+            "completed": list(checkpoints[analysis["issue_url"]]["completed"]) if analysis["issue_url"] in checkpoints else ["analysis"],
+            "download": checkpoints.get(analysis["issue_url"], {}).get("download")
+        }
+        for analysis in analyses
+    }
+    
+    stages = [
+        ("solution", "planning", "solution_plan", plan_solutions_batch_async, None),
+        ("prompt", "prompting", "generated_prompt", write_prompts_batch_async, "solution"),
+    ]
+    
+    for stage, progress_stage, field, batch_fn, requires in stages:
+        todo = [
+            analysis for analysis in analyses
+            if stage not in checkpoints[analysis["issue_url"]]["completed"]
+            and (requires is None or requires in checkpoints[analysis["issue_url"]]["completed"])
+        ]
+        
+        async def run_batch(batch: list):
+            await _notify(progress, progress_stage, f"Batching {len(batch)} issue(s) in one request")
+            async with stage_semaphore(stage):
+                results = await batch_fn(batch)
+            
+            for analysis in batch:
+                issue_url = analysis["issue_url"]
+                if issue_url not in results:
+                    print(f"  ↩️ No batched {stage} for {issue_url[:50]}, falling back to a single call")
+                    continue
+                
+                analysis[field] = results[issue_url]
+                checkpoints[issue_url]["completed"].append(stage)
+                await _notify(progress, progress_stage, "Ready (batched)", issue_url=issue_url, data={field: results[issue_url]})
+                if job_id:
+                    await checkpoint_store.save(
+                        job_id, analysis, checkpoints[issue_url]["completed"], checkpoints[issue_url].get("download")
+                    )
+        
+        await asyncio.gather(*(run_batch(batch) for batch in batch_chunks(todo)))
+    
+    return checkpoints
+
+
+async def run_reports_async(analyses: list, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Draft proposals for already-analysed issues, one concurrent task per issue."""
+    print(f"📝 Drafting {len(analyses)} proposal(s) concurrently...")
+    results = await asyncio.gather(*(_draft_issue_report(analysis, progress) for analysis in analyses))
+    
+    return {
+        "analyses": analyses,
+        "report_downloads": [download for download, _ in results],
+        "current_step": "reports_ready"
+    }
+
+
 async def run_analysis_async(
     issue_urls: list,
-    generate_reports: bool = False
+    generate_reports: bool = False,
+    job_id: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    batch_mode: bool = False
 ) -> Dict[str, Any]:
     """
     Run full analysis pipeline using YOUR working agents.
+    
+    Progress is checkpointed per issue and stage under job_id. Without a
+    job_id, an unfinished job for the same request that no other run holds
+    is resumed from the last completed stage of each issue; otherwise a new
+    job is started. The run holds its job until it finishes, so a job that
+    is already running is not run again. When progress is given, stage
+    updates and streamed model output are sent to it as they happen. In
+    batch_mode the plan and prompt stages first run as multi-issue requests.
     """
-    from agents.issue_finder import find_issues_agent
-    from agents.code_analyzer import analyze_code_agent
-    from agents.solution_suggester import suggest_solution_agent
-    from agents.prompt_generator import generate_prompt_agent
-    from agents.report_drafter import draft_report_agent
-    
-    print(f"\n🚀 Starting analysis for {len(issue_urls)} issue(s)...")
-    
-    # Step 1: Get issue details for the URLs
-    # We need to call issue finder first to populate found_issues
-    print("📍 Step 1: Fetching issue metadata...")
-    search_state = await asyncio.to_thread(
-        find_issues_agent,
-        {"skills": [], "selected_issue_urls": [], "analyses": [], "user_choice": None, "report_downloads": [], "current_step": "start", "error": None}
-    )
+    from agents.code_analyzer import analyze_code_agent_async
     
-    # Filter to only our selected URLs
-    all_found = search_state.get("found_issues", [])
-    found_issues = [issue for issue in all_found if issue["url"] in issue_urls]
-    
-    # If we couldn't find them, create basic entries
-    if not found_issues:
-        found_issues = [
-            {
-                "url": url,
-                "api_url": url.replace("github.com", "api.github.com/repos").replace("/issues/", "/issues/"),
-                "title": "Issue",
-                "repo": url.split("github.com/")[-1].split("/issues/")[0] if "github.com" in url else "unknown",
-                "labels": []
-            }
-            for url in issue_urls
-        ]
+    if job_id is None:
+        job_id = await checkpoint_store.find_resumable(issue_urls, generate_reports)
+        if job_id is None or not await checkpoint_store.claim(job_id):
+            job_id = new_job_id()
+            await checkpoint_store.save_job(job_id, issue_urls, generate_reports)
+            await checkpoint_store.claim(job_id)
+    elif not await checkpoint_store.claim(job_id):
+        print(f"⚠️ Job {job_id} is already running")
+        return {"error": f"Job {job_id} is already running", "job_id": job_id, "busy": True}
+    
+    print(f"\n🚀 Starting analysis for {len(issue_urls)} issue(s) (job {job_id})...")
+    
+    checkpoints = await checkpoint_store.load(job_id)
+    pending_urls = [url for url in issue_urls if url not in checkpoints]
     
+    if checkpoints:
+        print(f"♻️ Resuming {len(checkpoints)} issue(s) from checkpoints")
+    
+    cleared = False
     state = {
         "skills": [],
-        "found_issues": found_issues,
-        "selected_issue_urls": issue_urls,
+        "found_issues": [],
+        "selected_issue_urls": pending_urls,
         "analyses": [],
         "user_choice": "draft_report" if generate_reports else "end",
         "report_downloads": [],
         "current_step": "start",
-        "error": None
+        "error": None,
+        "job_id": job_id,
+        "incomplete_issue_urls": []
     }
     
     try:
-        # Step 2: Analyze code (YOUR agent)
-        print("📍 Step 2: Analyzing issues...")
-        state = await asyncio.to_thread(analyze_code_agent, state)
+        if pending_urls:
+            # Step 1: Resolve issue metadata straight from the URLs
+            print("📍 Step 1: Resolving issue metadata...")
+            await _notify(progress, "analyzing", f"Fetching {len(pending_urls)} issue(s) from GitHub")
+            state["found_issues"] = await resolve_issues(pending_urls)
+            
+            # Step 2: Analyze code (YOUR agent)
+            print("📍 Step 2: Analyzing issues...")
+            state = {**state, **await analyze_code_agent_async(state)}
+            
+            await asyncio.gather(*(
+                checkpoint_store.save(job_id, analysis, ["analysis"])
+                for analysis in state["analyses"]
+            ))
         
-        if not state.get("analyses"):
+        by_url = {analysis["issue_url"]: analysis for analysis in state["analyses"]}
+        by_url.update({url: checkpoint["analysis"] for url, checkpoint in checkpoints.items()})
+        analyses = [by_url[url] for url in issue_urls if url in by_url]
+        
+        if not analyses:
             print("❌ No analyses generated")
             return state
         
-        # Step 3: Generate solution plans (YOUR agent)
-        print("📍 Step 3: Generating solution plans...")
-        state = await asyncio.to_thread(suggest_solution_agent, state)
+        if batch_mode and len(analyses) > 1:
+            print(f"📍 Steps 3-4: Batching plans and prompts for {len(analyses)} issues...")
+            checkpoints = await _run_batched_stages(analyses, checkpoints, job_id, progress)
+        
+        # Steps 3-5: Each issue flows through its LLM stages independently
+        print(f"📍 Steps 3-5: Running {len(analyses)} issue pipeline(s) concurrently...")
+        results = await asyncio.gather(*(
+            _run_issue_pipeline(analysis, generate_reports, job_id, checkpoints.get(analysis["issue_url"]), progress)
+            for analysis in analyses
+        ))
         
-        # Step 4: Generate prompts (YOUR agent)
-        print("📍 Step 4: Generating prompts...")
-        state = await asyncio.to_thread(generate_prompt_agent, state)
+        state["analyses"] = [analysis for analysis, _, _ in results]
+        state["report_downloads"] = [download for _, download, _ in results if download]
+        state["incomplete_issue_urls"] = [analysis["issue_url"] for analysis, _, complete in results if not complete]
+        state["current_step"] = "reports_ready" if generate_reports else "prompts_ready"
         
-        # Step 5: Draft reports if requested (YOUR agent)
-        if generate_reports:
-            print("📍 Step 5: Drafting GSOC proposals...")
-            state = await asyncio.to_thread(draft_report_agent, state)
+        if state["incomplete_issue_urls"]:
+            print(f"⚠️ {len(state['incomplete_issue_urls'])} issue(s) used fallback output; resumable as job {job_id}")
+        else:
+            await checkpoint_store.clear(job_id)
+            cleared = True
         
         print(f"✅ Analysis complete for {len(state.get('analyses', []))} issues!\n")
         return state
@@ -103,3 +396,25 @@ async def run_analysis_async(
         print(f"❌ Error in pipeline: {e}")
         state["error"] = str(e)
         return state
+    
+    finally:
+        if not cleared:
+            await checkpoint_store.release(job_id)
+
+
+async def resume_analysis_async(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Resume a checkpointed analysis job.
+    
+    Returns:
+        Pipeline result, or None if the job is unknown or expired
+    """
+    job = await checkpoint_store.get_job(job_id)
+    if not job:
+        return None
+    
+    return await run_analysis_async(
+        job["issue_urls"],
+        generate_reports=job["generate_reports"],
+        job_id=job_id
+    )
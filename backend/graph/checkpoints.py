@@ -0,0 +1,325 @@
+"""
+Stage-level checkpoints for the async analysis pipeline.
+
+Each issue's analysis is saved after every completed stage so a failed or
+degraded run can resume from the last completed stage instead of
+re-fetching GitHub context and re-running finished LLM calls.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from database.connection import get_db
+
+CHECKPOINTS_DIR = "checkpoints"
+CHECKPOINT_TTL_HOURS = 24
+# How long a run's claim on its job lasts before the job counts as abandoned
+JOB_LEASE_MINUTES = float(os.getenv("JOB_LEASE_MINUTES", "30"))
+
+# Pipeline stages in execution order
+STAGES = ["analysis", "solution", "prompt", "report"]
+
+_LOCK_FILE = "running.lock"
+
+
+def request_key_for(issue_urls: List[str], generate_reports: bool) -> str:
+    """Deterministic key of an analyze request, used to find a job to resume."""
+    key = json.dumps([sorted(issue_urls), generate_reports])
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def new_job_id() -> str:
+    """Unique id for a new job, so identical concurrent requests never share one."""
+    return uuid.uuid4().hex[:16]
+
+
+def _url_key(issue_url: str) -> str:
+    return hashlib.sha1(issue_url.encode()).hexdigest()[:16]
+
+
+class CheckpointStore:
+    """
+    Checkpoint store backed by MongoDB ('workflow_checkpoints' and
+    'workflow_jobs'), or by JSON files under CHECKPOINTS_DIR when no
+    database is connected.
+    
+    A run claims its job for JOB_LEASE_MINUTES, so an identical request or
+    an explicit resume cannot run (and clear) the same job concurrently.
+    """
+    
+    def __init__(self, local_dir: str = CHECKPOINTS_DIR):
+        self.local_dir = local_dir
+    
+    # ----- local file helpers -----
+    
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.local_dir, job_id)
+    
+    def _write_json(self, path: str, data: Dict[str, Any]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    
+    def _read_dir(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        checkpoints = {}
+        job_dir = self._job_dir(job_id)
+        if not os.path.isdir(job_dir):
+            return checkpoints
+        
+        for name in os.listdir(job_dir):
+            if not name.endswith(".json") or name == "job.json":
+                continue
+            with open(os.path.join(job_dir, name)) as f:
+                checkpoint = json.load(f)
+            checkpoints[checkpoint["issue_url"]] = checkpoint
+        return checkpoints
+    
+    def _read_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A local job's request, removing the job once it has expired."""
+        path = os.path.join(self._job_dir(job_id), "job.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            job = json.load(f)
+        
+        if job.get("expires_at", 0) <= time.time():
+            self._remove_dir(job_id)
+            return None
+        return job
+    
+    def _find_local(self, request_key: str) -> Optional[str]:
+        """Newest local job for a request that is not claimed by a run."""
+        if not os.path.isdir(self.local_dir):
+            return None
+        
+        jobs = []
+        for job_id in os.listdir(self.local_dir):
+            if self._lock_held(job_id):
+                continue
+            job = self._read_job(job_id)
+            if job and job.get("request_key") == request_key:
+                jobs.append((job["expires_at"], job_id))
+        
+        return max(jobs)[1] if jobs else None
+    
+    def _lock_held(self, job_id: str) -> bool:
+        path = os.path.join(self._job_dir(job_id), _LOCK_FILE)
+        try:
+            return time.time() - os.path.getmtime(path) < JOB_LEASE_MINUTES * 60
+        except OSError:
+            return False
+    
+    def _claim_local(self, job_id: str) -> bool:
+        """Take the job's lock file (atomically), replacing an abandoned one."""
+        path = os.path.join(self._job_dir(job_id), _LOCK_FILE)
+        os.makedirs(self._job_dir(job_id), exist_ok=True)
+        
+        if os.path.exists(path) and not self._lock_held(job_id):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+    
+    def _release_local(self, job_id: str):
+        try:
+            os.remove(os.path.join(self._job_dir(job_id), _LOCK_FILE))
+        except OSError:
+            pass
+    
+    def _remove_dir(self, job_id: str):
+        job_dir = self._job_dir(job_id)
+        if os.path.isdir(job_dir):
+            for name in os.listdir(job_dir):
+                os.remove(os.path.join(job_dir, name))
+            os.rmdir(job_dir)
+    
+    # ----- public API -----
+    
+    async def save_job(self, job_id: str, issue_urls: List[str], generate_reports: bool):
+        """Record a job's request so it can be resumed by id or by request."""
+        job = {
+            "job_id": job_id,
+            "request_key": request_key_for(issue_urls, generate_reports),
+            "issue_urls": issue_urls,
+            "generate_reports": generate_reports
+        }
+        
+        try:
+            db = await get_db()
+            if db is not None:
+                await db.workflow_jobs.update_one(
+                    {"job_id": job_id},
+                    {"$set": {**job, "expires_at": datetime.utcnow() + timedelta(hours=CHECKPOINT_TTL_HOURS)}},
+                    upsert=True
+                )
+                return
+            
+            # Epoch seconds; the local store has no TTL index, so readers check it
+            path = os.path.join(self._job_dir(job_id), "job.json")
+            await asyncio.to_thread(self._write_json, path, {**job, "expires_at": time.time() + CHECKPOINT_TTL_HOURS * 3600})
+        
+        except Exception as e:
+            print(f"⚠️ Job checkpoint write failed: {e}")
+    
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's request, or None if unknown or expired."""
+        try:
+            db = await get_db()
+            if db is not None:
+                return await db.workflow_jobs.find_one(
+                    {"job_id": job_id, "expires_at": {"$gt": datetime.utcnow()}},
+                    {"_id": 0}
+                )
+            
+            return await asyncio.to_thread(self._read_job, job_id)
+        
+        except Exception as e:
+            print(f"⚠️ Job checkpoint read failed: {e}")
+            return None
+    
+    async def find_resumable(self, issue_urls: List[str], generate_reports: bool) -> Optional[str]:
+        """Id of the newest unexpired job for the same request that no run holds."""
+        request_key = request_key_for(issue_urls, generate_reports)
+        
+        try:
+            db = await get_db()
+            if db is not None:
+                now = datetime.utcnow()
+                job = await db.workflow_jobs.find_one(
+                    {
+                        "request_key": request_key,
+                        "expires_at": {"$gt": now},
+                        "$or": [{"running_until": None}, {"running_until": {"$lte": now}}]
+                    },
+                    {"job_id": 1},
+                    sort=[("expires_at", -1)]
+                )
+                return job["job_id"] if job else None
+            
+            return await asyncio.to_thread(self._find_local, request_key)
+        
+        except Exception as e:
+            print(f"⚠️ Job lookup failed: {e}")
+            return None
+    
+    async def claim(self, job_id: str) -> bool:
+        """
+        Claim a job for the current run.
+        
+        Returns:
+            False if another run holds the job (and its lease has not lapsed)
+        """
+        try:
+            db = await get_db()
+            if db is not None:
+                now = datetime.utcnow()
+                result = await db.workflow_jobs.update_one(
+                    {"job_id": job_id, "$or": [{"running_until": None}, {"running_until": {"$lte": now}}]},
+                    {"$set": {"running_until": now + timedelta(minutes=JOB_LEASE_MINUTES)}}
+                )
+                return result.modified_count == 1
+            
+            return await asyncio.to_thread(self._claim_local, job_id)
+        
+        except Exception as e:
+            print(f"⚠️ Job claim failed: {e}")
+            return False
+    
+    async def release(self, job_id: str):
+        """Release the current run's claim on a job it did not clear."""
+        try:
+            db = await get_db()
+            if db is not None:
+                await db.workflow_jobs.update_one({"job_id": job_id}, {"$set": {"running_until": None}})
+                return
+            
+            await asyncio.to_thread(self._release_local, job_id)
+        
+        except Exception as e:
+            print(f"⚠️ Job release failed: {e}")
+    
+    async def load(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Load a job's checkpoints.
+        
+        Returns:
+            Dictionary mapping issue_url to {issue_url, analysis, completed, download}
+        """
+        try:
+            db = await get_db()
+            if db is not None:
+                cursor = db.workflow_checkpoints.find(
+                    {"job_id": job_id, "expires_at": {"$gt": datetime.utcnow()}},
+                    {"_id": 0}
+                )
+                return {checkpoint["issue_url"]: checkpoint async for checkpoint in cursor}
+            
+            if await asyncio.to_thread(self._read_job, job_id) is None:
+                return {}
+            return await asyncio.to_thread(self._read_dir, job_id)
+        
+        except Exception as e:
+            print(f"⚠️ Checkpoint read failed: {e}")
+            return {}
+    
+    async def save(
+        self,
+        job_id: str,
+        analysis: Dict[str, Any],
+        completed: List[str],
+        download: Optional[Dict[str, str]] = None
+    ):
+        """Save one issue's analysis after a completed stage."""
+        checkpoint = {
+            "job_id": job_id,
+            "issue_url": analysis["issue_url"],
+            "analysis": dict(analysis),
+            "completed": list(completed),
+            "download": download
+        }
+        
+        try:
+            db = await get_db()
+            if db is not None:
+                await db.workflow_checkpoints.update_one(
+                    {"job_id": job_id, "issue_url": analysis["issue_url"]},
+                    {"$set": {**checkpoint, "expires_at": datetime.utcnow() + timedelta(hours=CHECKPOINT_TTL_HOURS)}},
+                    upsert=True
+                )
+                return
+            
+            path = os.path.join(self._job_dir(job_id), f"{_url_key(analysis['issue_url'])}.json")
+            await asyncio.to_thread(self._write_json, path, checkpoint)
+        
+        except Exception as e:
+            print(f"⚠️ Checkpoint write failed: {e}")
+    
+    async def clear(self, job_id: str):
+        """Delete a finished job and its checkpoints."""
+        try:
+            db = await get_db()
+            if db is not None:
+                await db.workflow_checkpoints.delete_many({"job_id": job_id})
+                await db.workflow_jobs.delete_one({"job_id": job_id})
+                return
+            
+            await asyncio.to_thread(self._remove_dir, job_id)
+        
+        except Exception as e:
+            print(f"⚠️ Checkpoint cleanup failed: {e}")
+
+
+# Global instance
+checkpoint_store = CheckpointStore()
@@ -2,7 +2,30 @@
 Define the AgentState that will be passed between all agents in the graph.
 This is the central data structure for your workflow.
 """
-from typing import TypedDict, List, Optional
+import operator
+from typing import TypedDict, List, Optional, Annotated
+
+
+def _latest(current: str, update: str) -> str:
+    """Reducer letting parallel branches each report their step."""
+    return update
+
+
+def merge_analyses(current: List[dict], update: List[dict]) -> List[dict]:
+    """
+    Reducer merging analysis updates into the list by issue_url.
+    
+    Lets per-issue branches each contribute their own analysis; an update
+    for an issue already present is merged into it in place.
+    """
+    merged = {analysis["issue_url"]: analysis for analysis in current}
+    
+    for analysis in update:
+        url = analysis["issue_url"]
+        merged[url] = {**merged[url], **analysis} if url in merged else analysis
+    
+    return list(merged.values())
+
 
 class AgentState(TypedDict):
     """The state object that flows through the LangGraph workflow."""
@@ -15,14 +38,26 @@ class AgentState(TypedDict):
     selected_issue_urls: List[str]  # Which issues user selected
     
     # Analysis results (one per selected issue)
-    analyses: List[dict]  # Each: {issue_url, context, solution_plan, generated_prompt}
+    analyses: Annotated[List[dict], merge_analyses]  # Each: {issue_url, context, solution_plan, generated_prompt}
     
     # User feedback
     user_choice: Optional[str]  # "draft_report", "find_more", "end"
     
     # Final outputs
-    report_downloads: List[dict]  # Each: {issue_title, download_url}
+    report_downloads: Annotated[List[dict], operator.add]  # Each: {issue_title, download_url}
     
     # System state
-    current_step: str  # For tracking workflow progress
+    current_step: Annotated[str, _latest]  # For tracking workflow progress
     error: Optional[str]  # For error handling
+
+
+class IssueState(TypedDict):
+    """The state of one per-issue branch in the fan-out workflow."""
+    
+    issue: dict  # {url, api_url, ...} from found_issues
+    user_choice: Optional[str]
+    
+    analysis: dict  # {issue_url, context, solution_plan, generated_prompt}
+    report_downloads: Annotated[List[dict], operator.add]
+    
+    current_step: Annotated[str, _latest]
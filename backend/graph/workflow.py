@@ -1,23 +1,35 @@
 """
 LangGraph workflow definition - Simplified.
 """
+from typing import Dict, List, Union
 from langgraph.graph import StateGraph, END
-from graph.state import AgentState
+from langgraph.types import Send
+from graph.state import AgentState, IssueState
 from agents.issue_finder import find_issues_agent
-from agents.code_analyzer import analyze_code_agent
-from agents.solution_suggester import suggest_solution_agent
-from agents.prompt_generator import generate_prompt_agent
-from agents.report_drafter import draft_report_agent
+from agents.code_analyzer import analyze_code_agent, analyze_issue
+from agents.solution_suggester import suggest_solution_agent, plan_solution, SOLUTION_FALLBACK
+from agents.prompt_generator import generate_prompt_agent, write_prompt, fallback_prompt
+from agents.report_drafter import draft_report_agent, write_proposal, fallback_proposal, save_proposal
 
 
-def build_workflow() -> StateGraph:
+def build_workflow(fan_out: bool = False) -> StateGraph:
     """
     Build the complete LangGraph workflow.
     
-    Simple linear flow:
-    find_issues → analyze_code → suggest_solutions → generate_prompts → (conditional) draft_reports
+    Args:
+        fan_out: Run each selected issue as its own parallel branch
+                 (see build_fanout_workflow) instead of looping in each node
+    
+    find_issues → analyze_code → suggest_solutions → generate_prompts
+                                                   ↘ (conditional) draft_reports
+    
+    Prompt generation and proposal drafting both depend only on the context
+    and solution plan, so when reports are requested they run in parallel.
     """
     
+    if fan_out:
+        return build_fanout_workflow()
+    
     workflow = StateGraph(AgentState)
     
     # Add all nodes
@@ -33,29 +45,146 @@ def build_workflow() -> StateGraph:
     # Linear edges
     workflow.add_edge("find_issues", "analyze_code")
     workflow.add_edge("analyze_code", "suggest_solutions")
-    workflow.add_edge("suggest_solutions", "generate_prompts")
     
-    # Conditional: generate reports or not
-    def should_draft_reports(state: AgentState) -> str:
+    # Conditional: fan out to reports alongside prompts, or prompts only
+    def should_draft_reports(state: AgentState) -> List[str]:
         """Check if we should draft reports."""
         user_choice = state.get("user_choice", "end")
         
         if user_choice == "draft_report":
-            print("🔀 Drafting reports...")
-            return "draft_reports"
+            print("🔀 Generating prompts and drafting reports in parallel...")
+            return ["generate_prompts", "draft_reports"]
         else:
-            print("🔀 Skipping reports, ending...")
-            return "end"
+            print("🔀 Skipping reports...")
+            return ["generate_prompts"]
     
     workflow.add_conditional_edges(
-        "generate_prompts",
+        "suggest_solutions",
         should_draft_reports,
-        {
-            "draft_reports": "draft_reports",
-            "end": END
-        }
+        ["generate_prompts", "draft_reports"]
     )
     
+    workflow.add_edge("generate_prompts", END)
     workflow.add_edge("draft_reports", END)
     
     return workflow.compile()
+
+
+# ============= Fan-out (map/reduce) variant =============
+
+def _analyze_issue_node(state: IssueState) -> Dict:
+    """Fetch and compile the context for this branch's issue."""
+    issue = state["issue"]
+    return {
+        "analysis": analyze_issue(issue["url"], issue["api_url"]),
+        "current_step": "analysis_complete"
+    }
+
+
+def _suggest_solution_node(state: IssueState) -> Dict:
+    """Generate the solution plan for this branch's issue."""
+    analysis = dict(state["analysis"])
+    analysis["solution_plan"] = plan_solution(analysis) or SOLUTION_FALLBACK
+    return {"analysis": analysis, "current_step": "solutions_ready"}
+
+
+def _generate_prompt_node(state: IssueState) -> Dict:
+    """Generate the golden prompt for this branch's issue."""
+    analysis = dict(state["analysis"])
+    analysis["generated_prompt"] = write_prompt(analysis) or fallback_prompt(analysis)
+    return {"analysis": analysis, "current_step": "prompts_ready"}
+
+
+def _draft_report_node(state: IssueState) -> Dict:
+    """Draft the proposal for this branch's issue."""
+    analysis = state["analysis"]
+    proposal_text = write_proposal(analysis) or fallback_proposal(analysis)
+    return {
+        "report_downloads": [save_proposal(analysis, proposal_text)],
+        "current_step": "reports_ready"
+    }
+
+
+def build_issue_graph() -> StateGraph:
+    """
+    Build the per-issue sub-graph run by each fan-out branch.
+    
+    analyze_issue → suggest_solution → generate_prompt
+                                     ↘ (conditional) draft_report
+    """
+    graph = StateGraph(IssueState)
+    
+    graph.add_node("analyze_issue", _analyze_issue_node)
+    graph.add_node("suggest_solution", _suggest_solution_node)
+    graph.add_node("generate_prompt", _generate_prompt_node)
+    graph.add_node("draft_report", _draft_report_node)
+    
+    graph.set_entry_point("analyze_issue")
+    graph.add_edge("analyze_issue", "suggest_solution")
+    
+    def next_stages(state: IssueState) -> List[str]:
+        """Prompt always; proposal alongside it when reports were requested."""
+        if state.get("user_choice") == "draft_report":
+            return ["generate_prompt", "draft_report"]
+        return ["generate_prompt"]
+    
+    graph.add_conditional_edges("suggest_solution", next_stages, ["generate_prompt", "draft_report"])
+    
+    graph.add_edge("generate_prompt", END)
+    graph.add_edge("draft_report", END)
+    
+    return graph.compile()
+
+
+def build_fanout_workflow() -> StateGraph:
+    """
+    Build the map/reduce variant of the workflow.
+    
+    find_issues → (Send, one branch per selected issue) process_issue → END
+    
+    Each branch runs the per-issue sub-graph; LangGraph schedules the
+    branches in parallel and the AgentState reducers merge their analyses
+    and report downloads back together.
+    """
+    issue_graph = build_issue_graph()
+    
+    def dispatch_issues(state: AgentState) -> Union[str, List[Send]]:
+        """Map: one Send per selected issue we have metadata for."""
+        url_to_issue = {issue["url"]: issue for issue in state.get("found_issues", [])}
+        selected = [url for url in state.get("selected_issue_urls", []) if url in url_to_issue]
+        
+        if not selected:
+            print("🔀 No issues selected, ending...")
+            return END
+        
+        print(f"🔀 Fanning out {len(selected)} issue(s)...")
+        return [
+            Send("process_issue", {
+                "issue": url_to_issue[url],
+                "user_choice": state.get("user_choice"),
+                "analysis": {},
+                "report_downloads": [],
+                "current_step": "start"
+            })
+            for url in selected
+        ]
+    
+    def process_issue(state: IssueState) -> Dict:
+        """Reduce: run one branch and hand its results back to AgentState."""
+        result = issue_graph.invoke(state)
+        return {
+            "analyses": [result["analysis"]],
+            "report_downloads": result.get("report_downloads", []),
+            "current_step": result["current_step"]
+        }
+    
+    workflow = StateGraph(AgentState)
+    
+    workflow.add_node("find_issues", find_issues_agent)
+    workflow.add_node("process_issue", process_issue)
+    
+    workflow.set_entry_point("find_issues")
+    workflow.add_conditional_edges("find_issues", dispatch_issues, ["process_issue", END])
+    workflow.add_edge("process_issue", END)
+    
+    return workflow.compile()
@@ -15,8 +15,8 @@ def main():
     print("🚀 SourceSage - Agent Workflow Test")
     print("=" * 60)
     
-    # Build the graph
-    graph = build_workflow()
+    # Build the graph (one parallel branch per selected issue)
+    graph = build_workflow(fan_out=True)
     
     # Initial state
     initial_state = {
@@ -0,0 +1,65 @@
+"""
+Tests for hedging and failover in the LLM router when streaming.
+"""
+import asyncio
+import pytest
+from utils.llm_router import LLMRouter
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setenv("CEREBRAS_API_KEY", "test")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    
+    router = LLMRouter()
+    monkeypatch.setattr(router, "hedge_delay", lambda provider, model: 0.05)
+    return router
+
+
+def _run(router, attempt):
+    calls, tokens = [], []
+    
+    async def fake_attempt(provider, model, prompt, max_tokens, temperature, on_token):
+        calls.append(provider)
+        return await attempt(provider, on_token)
+    
+    async def on_token(delta, restart=False):
+        tokens.append((delta, restart))
+    
+    router._attempt = fake_attempt
+    result = asyncio.run(router.route("large", "prompt", on_token=on_token, use_cache=False))
+    return result, calls, tokens
+
+
+def test_streaming_call_is_not_hedged(router):
+    async def attempt(provider, on_token):
+        if provider == "gemini":
+            return "B-full"
+        # Starts streaming within the hedge delay, finishes well after it
+        await asyncio.sleep(0.01)
+        for i in range(5):
+            await on_token(f"A{i} ")
+            await asyncio.sleep(0.03)
+        return "A-full"
+    
+    result, calls, tokens = _run(router, attempt)
+    
+    assert result == "A-full"
+    assert calls == ["cerebras"]
+    assert all(not restart for _, restart in tokens)
+
+
+def test_failover_after_partial_stream_restarts(router):
+    async def attempt(provider, on_token):
+        if provider == "cerebras":
+            await on_token("partial ")
+            return None
+        await on_token("B-full")
+        return "B-full"
+    
+    result, calls, tokens = _run(router, attempt)
+    
+    assert result == "B-full"
+    assert calls == ["cerebras", "gemini"]
+    assert tokens == [("partial ", False), ("B-full", True)]
@@ -0,0 +1,15 @@
+"""
+Tests for the structural quality checks that gate model escalation.
+"""
+from utils.model_tiering import is_well_formed
+
+
+def test_whitespace_only_output_is_rejected():
+    assert not is_well_formed("prompt", " " * 300)
+    assert not is_well_formed("prompt", "\n" * 300)
+
+
+def test_prompt_must_end_a_sentence():
+    text = "Implement the fix in the parser module. " * 10
+    assert is_well_formed("prompt", text + "\n\n")
+    assert not is_well_formed("prompt", text + "and then")
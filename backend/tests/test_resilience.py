@@ -0,0 +1,36 @@
+"""
+Tests for classifying provider errors as transient.
+"""
+from utils.resilience import is_transient, status_code
+
+
+class _GoogleStyleError(Exception):
+    """Mimics google-api-core exceptions, which carry the HTTP status as .code."""
+    
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class _SdkStyleError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def test_google_style_code_is_read():
+    assert status_code(_GoogleStyleError(503, "The model is overloaded.")) == 503
+    assert is_transient(_GoogleStyleError(503, "The model is overloaded."))
+    assert is_transient(_GoogleStyleError(429, "Resource has been exhausted"))
+
+
+def test_client_errors_are_not_transient():
+    error = _GoogleStyleError(400, "Invalid argument calling models/gemini:generateContent")
+    assert not is_transient(error)
+    assert not is_transient(_SdkStyleError(401, "unauthorized"))
+
+
+def test_message_hints_match_whole_words():
+    assert is_transient(Exception("Rate limit exceeded"))
+    assert is_transient(Exception("Connection reset by peer"))
+    assert not is_transient(Exception("error in generateContent: separate accurate"))
@@ -0,0 +1,202 @@
+"""
+Process-wide admission control for LLM calls.
+
+Every provider/model gets a controller that bounds in-flight calls and the
+tokens sent per minute. Calls over the limit wait in a queue that is fair
+across requests: waiters are grouped by request id and served round-robin,
+so one large analyze request cannot starve the others.
+"""
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Any
+
+# Default (max in-flight calls, tokens per minute; 0 = unlimited) per provider.
+# Override with LLM_MAX_IN_FLIGHT_<PROVIDER> and LLM_TPM_<PROVIDER>.
+DEFAULT_LIMITS = {
+    "cerebras": (8, 60000),
+    "gemini": (4, 0),
+    "openrouter": (4, 0),
+}
+
+WAIT_SAMPLES = 200
+
+# Request the current LLM calls belong to (set per API request)
+current_request_id: ContextVar[str] = ContextVar("llm_request_id", default="default")
+
+
+def new_request_scope() -> str:
+    """Start a new fair-queueing scope for the current request."""
+    request_id = uuid.uuid4().hex[:12]
+    current_request_id.set(request_id)
+    return request_id
+
+
+class AdmissionController:
+    """
+    In-flight and tokens-per-minute limiter with a round-robin queue.
+    
+    Not thread-safe; intended for use from the event loop.
+    """
+    
+    def __init__(self, name: str, max_in_flight: int, tokens_per_minute: int = 0):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.tokens_per_minute = tokens_per_minute
+        self._in_flight = 0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._window: deque = deque()  # (admitted_at, tokens)
+        self._waits: deque = deque(maxlen=WAIT_SAMPLES)
+        self._admitted = 0
+        self._wake_handle = None
+    
+    def _window_tokens(self) -> int:
+        cutoff = time.monotonic() - 60
+        while self._window and self._window[0][0] <= cutoff:
+            self._window.popleft()
+        return sum(tokens for _, tokens in self._window)
+    
+    def _can_admit(self, tokens: int) -> bool:
+        if self._in_flight >= self.max_in_flight:
+            return False
+        if self.tokens_per_minute <= 0:
+            return True
+        
+        used = self._window_tokens()
+        # An oversized call is let through on its own rather than never
+        return used == 0 or used + tokens <= self.tokens_per_minute
+    
+    def _admit(self, tokens: int, enqueued_at: float):
+        self._in_flight += 1
+        self._admitted += 1
+        self._window.append((time.monotonic(), tokens))
+        self._waits.append(time.monotonic() - enqueued_at)
+    
+    def _dispatch(self):
+        """Admit queued calls, one request at a time in rotation."""
+        while self._queues:
+            request_id, waiters = next(iter(self._queues.items()))
+            future, tokens, enqueued_at = waiters[0]
+            
+            if future.done():  # Cancelled while queued
+                self._remove_waiter(request_id, future)
+                continue
+            
+            if not self._can_admit(tokens):
+                self._schedule_wake()
+                return
+            
+            waiters.popleft()
+            del self._queues[request_id]
+            if waiters:
+                self._queues[request_id] = waiters  # Back of the rotation
+            
+            self._admit(tokens, enqueued_at)
+            future.set_result(None)
+    
+    def _schedule_wake(self):
+        """Re-dispatch when the oldest tokens leave the one-minute window."""
+        if self._wake_handle is not None or self._in_flight >= self.max_in_flight or not self._window:
+            return
+        
+        delay = max(0.05, self._window[0][0] + 60 - time.monotonic())
+        self._wake_handle = asyncio.get_running_loop().call_later(delay, self._wake)
+    
+    def _wake(self):
+        self._wake_handle = None
+        self._dispatch()
+    
+    def _remove_waiter(self, request_id: str, future: asyncio.Future):
+        waiters = self._queues.get(request_id)
+        if waiters is None:
+            return
+        
+        for entry in waiters:
+            if entry[0] is future:
+                waiters.remove(entry)
+                break
+        if not waiters:
+            del self._queues[request_id]
+    
+    async def acquire(self, tokens: int):
+        """Wait for a slot for a call of about `tokens` tokens."""
+        enqueued_at = time.monotonic()
+        if not self._queues and self._can_admit(tokens):
+            self._admit(tokens, enqueued_at)
+            return
+        
+        request_id = current_request_id.get()
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(request_id, deque()).append((future, tokens, enqueued_at))
+        
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # Admitted just as we were cancelled
+            else:
+                self._remove_waiter(request_id, future)
+            raise
+    
+    def release(self):
+        """Free a slot and admit whoever is next."""
+        self._in_flight -= 1
+        self._dispatch()
+    
+    @asynccontextmanager
+    async def slot(self, tokens: int):
+        """
+        Hold a slot for the duration of a call.
+        
+        Usage:
+            async with admission_controller("cerebras", model).slot(tokens):
+                ...
+        """
+        await self.acquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Current load, queue depth and recent wait times."""
+        waits = sorted(self._waits)
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": sum(len(waiters) for waiters in self._queues.values()),
+            "queued_requests": len(self._queues),
+            "tokens_last_minute": self._window_tokens(),
+            "tokens_per_minute": self.tokens_per_minute,
+            "admitted": self._admitted,
+            "wait_ms": {
+                "avg": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                "max": round(1000 * waits[-1], 1) if waits else 0.0,
+            },
+        }
+
+
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def admission_controller(provider: str, model: str) -> AdmissionController:
+    """Get the shared admission controller for a provider/model."""
+    name = f"{provider}:{model}"
+    if name not in _controllers:
+        max_in_flight, tokens_per_minute = DEFAULT_LIMITS.get(provider, (4, 0))
+        _controllers[name] = AdmissionController(
+            name,
+            max_in_flight=int(os.getenv(f"LLM_MAX_IN_FLIGHT_{provider.upper()}", str(max_in_flight))),
+            tokens_per_minute=int(os.getenv(f"LLM_TPM_{provider.upper()}", str(tokens_per_minute)))
+        )
+    return _controllers[name]
+
+
+def admission_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every provider/model that has seen traffic."""
+    return {name: controller.metrics() for name, controller in _controllers.items()}
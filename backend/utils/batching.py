@@ -0,0 +1,65 @@
+"""
+Helpers for packing several issues into one LLM request.
+
+Issues are sent as a JSON array with short ids; the model answers with a
+JSON array of {"id": ..., "<field>": ...} objects that is parsed back per
+issue. Anything missing or unparseable is left for single-issue calls.
+"""
+import os
+import json
+import re
+from typing import Dict, List, Any, Optional
+
+BATCH_MAX_ISSUES = int(os.getenv("LLM_BATCH_MAX_ISSUES", "5"))
+
+
+def batch_chunks(items: List[Any], size: int = BATCH_MAX_ISSUES) -> List[List[Any]]:
+    """Split items into batches of at most size."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def batch_payload(entries: List[Dict[str, str]]) -> str:
+    """Serialize the per-issue inputs of a batch (each entry has an 'id')."""
+    return json.dumps(entries, indent=2, ensure_ascii=False)
+
+
+def response_format(field: str) -> str:
+    """Output instructions shared by the batched prompts."""
+    return (
+        "Respond with ONLY a JSON array, one object per issue in the same order, "
+        f'each of the form {{"id": "<issue id>", "{field}": "<text>"}}. '
+        "Escape newlines inside strings as \\n. Do not add any text outside the JSON."
+    )
+
+
+def parse_batch_response(text: Optional[str], ids: List[str], field: str) -> Dict[str, str]:
+    """
+    Parse a batched response into {id: text}.
+    
+    Tolerates code fences and text around the array. Ids that are missing,
+    unknown or empty are left out, so the caller can retry them one by one.
+    """
+    if not text:
+        return {}
+    
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        return {}
+    
+    try:
+        items = json.loads(text[start:end + 1], strict=False)
+    except json.JSONDecodeError as e:
+        print(f"⚠️ Batched response is not valid JSON: {e}")
+        return {}
+    
+    wanted = set(ids)
+    results = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        item_id = str(item.get("id", ""))
+        value = item.get(field)
+        if item_id in wanted and isinstance(value, str) and value.strip():
+            results[item_id] = value.strip()
+    return results
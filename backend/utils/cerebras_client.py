@@ -4,22 +4,30 @@ Cerebras API client - Ultra-fast inference.
 import os
 from typing import Optional
 from cerebras.cloud.sdk import Cerebras
+from utils.llm_cache import llm_cache, cache_key
+
+
+_client: Optional[Cerebras] = None
 
 
 def get_cerebras_client():
-    """Get configured Cerebras client."""
-    api_key = os.getenv("CEREBRAS_API_KEY")
-    if not api_key:
-        raise ValueError("CEREBRAS_API_KEY not found in environment variables")
-    
-    return Cerebras(api_key=api_key)
+    """Get the shared Cerebras client (one connection pool per process)."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("CEREBRAS_API_KEY")
+        if not api_key:
+            raise ValueError("CEREBRAS_API_KEY not found in environment variables")
+        
+        _client = Cerebras(api_key=api_key)
+    return _client
 
 
 def query_cerebras(
     prompt: str,
     max_tokens: int = 512,
     temperature: float = 0.7,
-    model: str = "llama-3.3-70b"  # ✅ Correct format: llama-3.3-70b
+    model: str = "llama-3.3-70b",  # ✅ Correct format: llama-3.3-70b
+    use_cache: bool = True
 ) -> Optional[str]:
     """
     Query Cerebras ultra-fast inference API.
@@ -34,10 +42,18 @@ def query_cerebras(
         max_tokens: Maximum tokens to generate
         temperature: Sampling temperature
         model: Model to use
+        use_cache: Serve and store the completion in the in-process LLM cache
         
     Returns:
         Generated text or None if error
     """
+    key = cache_key(model, prompt, max_tokens, temperature) if use_cache else None
+    if key:
+        cached = llm_cache.get_local(key)
+        if cached is not None:
+            print(f"  ⚡ LLM cache hit ({model})")
+            return cached
+    
     try:
         client = get_cerebras_client()
     except ValueError as e:
@@ -62,6 +78,8 @@ def query_cerebras(
         if response.choices and response.choices[0].message.content:
             result = response.choices[0].message.content.strip()
             print(f"  ⚡ Generated {len(result)} characters (ultra-fast)")
+            if key:
+                llm_cache.put_local(key, result)
             return result
         else:
             print(f"  ⚠️ Empty response")
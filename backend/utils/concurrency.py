@@ -0,0 +1,34 @@
+"""
+Process-wide concurrency limits for pipeline stages.
+"""
+import os
+import asyncio
+from typing import Dict
+
+# Default in-flight limits per stage; override with STAGE_CONCURRENCY_<STAGE>
+DEFAULT_STAGE_LIMITS = {
+    "solution": 4,
+    "prompt": 8,
+    "report": 4,
+}
+
+_stage_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def stage_limit(stage: str) -> int:
+    """Get the configured in-flight limit for a stage."""
+    default = DEFAULT_STAGE_LIMITS.get(stage, int(os.getenv("STAGE_CONCURRENCY_DEFAULT", "4")))
+    return max(1, int(os.getenv(f"STAGE_CONCURRENCY_{stage.upper()}", str(default))))
+
+
+def stage_semaphore(stage: str) -> asyncio.Semaphore:
+    """
+    Get the shared semaphore bounding a stage across all requests.
+    
+    Usage:
+        async with stage_semaphore("solution"):
+            ...
+    """
+    if stage not in _stage_semaphores:
+        _stage_semaphores[stage] = asyncio.Semaphore(stage_limit(stage))
+    return _stage_semaphores[stage]
@@ -0,0 +1,181 @@
+"""
+Token-aware budgeting of issue context for LLM prompts.
+
+Instead of fixed character slices, each stage gets a token budget that is
+shared between the sections of the issue context (title, description,
+comments) and the solution plan. Sections are compressed first, short
+sections keep everything they need, and whatever they leave over goes to
+the longer ones, which are then cut at a sentence boundary.
+"""
+import os
+import re
+from typing import Dict, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character heuristic
+    tiktoken = None
+
+# Input token budget per stage (context + plan), overridable with CONTEXT_BUDGET_<STAGE>
+STAGE_BUDGETS = {
+    "solution": 500,
+    "prompt": 450,
+    "report": 520,
+}
+
+# Relative share of the budget per section when everything has to be cut
+SECTION_WEIGHTS = {
+    "title": 1.0,
+    "description": 3.0,
+    "comments": 1.5,
+    "plan": 3.0,
+}
+
+CHARS_PER_TOKEN = 4
+_encoding = None
+
+
+def _get_encoding():
+    """Load the tokenizer once; False marks it as unavailable."""
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:  # e.g. encoding files not downloadable
+            print(f"⚠️ tiktoken unavailable, estimating tokens: {e}")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def stage_budget(stage: str) -> int:
+    """Get the configured input token budget for a stage."""
+    return int(os.getenv(f"CONTEXT_BUDGET_{stage.upper()}", str(STAGE_BUDGETS[stage])))
+
+
+def compress(text: str, max_code_lines: int = 12) -> str:
+    """
+    Drop low-information text before counting tokens.
+    
+    Removes HTML comments (issue template boilerplate) and quoted reply
+    lines, shortens long fenced code blocks, and collapses whitespace.
+    """
+    text = re.sub(r"<!--.*?-->", "", text, flags=re.DOTALL)
+    text = "\n".join(line for line in text.splitlines() if not line.lstrip().startswith(">"))
+    
+    def shorten_fence(match):
+        lines = match.group(2).strip("\n").splitlines()
+        if len(lines) > max_code_lines:
+            lines = lines[:max_code_lines] + [f"... ({len(lines) - max_code_lines} more lines)"]
+        return "```\n" + "\n".join(lines) + "\n```"
+    
+    text = re.sub(r"```([\w+-]*)\n(.*?)```", shorten_fence, text, flags=re.DOTALL)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut text to max_tokens, ending at a sentence or line boundary when possible."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    
+    # Shrink by the measured ratio until it fits
+    cut = text
+    while count_tokens(cut) > max_tokens:
+        if len(cut) == 1:
+            return ""  # Even one character (e.g. an emoji) is over budget
+        ratio = max_tokens / count_tokens(cut)
+        cut = cut[:max(1, int(len(cut) * ratio * 0.95))]
+    
+    # Back off to the last sentence end, unless that would lose too much
+    boundary = max(cut.rfind(". "), cut.rfind(".\n"), cut.rfind("\n"), cut.rfind("! "), cut.rfind("? "))
+    if boundary >= len(cut) * 0.6:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " …"
+
+
+def allocate(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+    """
+    Split a token budget between sections.
+    
+    Sections that fit within their weighted share keep their full size; the
+    rest is shared by weight among the sections that do not fit.
+    """
+    allocation = {}
+    remaining = dict(sizes)
+    left = budget
+    
+    while remaining:
+        total_weight = sum(SECTION_WEIGHTS[name] for name in remaining)
+        fitting = [
+            name for name, size in remaining.items()
+            if size <= left * SECTION_WEIGHTS[name] / total_weight
+        ]
+        
+        if not fitting:
+            for name in remaining:
+                allocation[name] = int(left * SECTION_WEIGHTS[name] / total_weight)
+            break
+        
+        for name in fitting:
+            allocation[name] = remaining.pop(name)
+            left -= allocation[name]
+    
+    return allocation
+
+
+def parse_context(context: str) -> Dict[str, str]:
+    """Split an analysis context (see code_analyzer) into its sections."""
+    match = re.match(
+        r"\*\*Issue Title:\*\*(.*?)\n\s*\*\*Description:\*\*\n(.*?)(?:\n\s*\*\*Recent Comments:\*\*\n?(.*))?$",
+        context,
+        flags=re.DOTALL
+    )
+    if not match:
+        return {"description": context}
+    
+    return {
+        "title": match.group(1).strip(),
+        "description": match.group(2).strip(),
+        "comments": (match.group(3) or "").strip()
+    }
+
+
+def budget_prompt_inputs(stage: str, context: str, plan: Optional[str] = None) -> Dict[str, str]:
+    """
+    Fit an analysis' context (and plan) into a stage's token budget.
+    
+    Returns:
+        Dictionary with the budgeted 'context' and 'plan' text
+    """
+    sections = {name: compress(text) for name, text in parse_context(context).items()}
+    if plan is not None:
+        sections["plan"] = compress(plan)
+    
+    sizes = {name: count_tokens(text) for name, text in sections.items() if text}
+    allocation = allocate(sizes, stage_budget(stage))
+    fitted = {name: truncate(sections[name], allocation[name]) for name in sizes}
+    
+    if "title" in sections:
+        parts = [
+            f"**Issue Title:** {fitted.get('title', '')}",
+            f"**Description:**\n{fitted.get('description', '')}",
+        ]
+        if fitted.get("comments"):
+            parts.append(f"**Recent Comments:**\n{fitted['comments']}")
+        budgeted_context = "\n\n".join(parts)
+    else:
+        budgeted_context = fitted.get("description", "")
+    
+    return {"context": budgeted_context, "plan": fitted.get("plan", "")}
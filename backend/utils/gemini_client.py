@@ -5,6 +5,8 @@ import os
 import time
 from typing import Optional
 import google.generativeai as genai
+from utils.llm_cache import llm_cache, cache_key
+from utils.resilience import provider_breaker, is_transient, backoff_delay
 
 
 def get_gemini_client():
@@ -23,11 +25,22 @@ def query_gemini(
     temperature: float = 0.7,
     model: str = "gemini-2.0-flash-exp",
     max_retries: int = 2,  # Reduced retries
-    use_fallback: bool = True  # NEW: Enable fallback
+    use_fallback: bool = True,  # NEW: Enable fallback
+    use_cache: bool = True
 ) -> Optional[str]:
     """
     Query Google Gemini API with OpenRouter fallback.
+    
+    Completions are served from and stored in the in-process LLM cache
+    unless use_cache is False.
     """
+    key = cache_key(model, prompt, max_tokens, temperature) if use_cache else None
+    if key:
+        cached = llm_cache.get_local(key)
+        if cached is not None:
+            print(f"  ⚡ LLM cache hit ({model})")
+            return cached
+    
     try:
         get_gemini_client()
     except ValueError as e:
@@ -36,7 +49,15 @@ def query_gemini(
             return _fallback_to_openrouter(prompt, max_tokens, temperature)
         return None
     
+    breaker = provider_breaker("gemini", model)
+    
     for attempt in range(max_retries):
+        if not breaker.allow():
+            print(f"  ⛔ Circuit open for Gemini ({model})")
+            if use_fallback:
+                return _fallback_to_openrouter(prompt, max_tokens, temperature)
+            return None
+        
         try:
             print(f"  🤖 Calling Gemini ({model})...")
             
@@ -50,9 +71,13 @@ def query_gemini(
                 )
             )
             
+            breaker.record_success()
+            
             if response and response.text:
                 result = response.text.strip()
                 print(f"  ✅ Generated {len(result)} characters")
+                if key:
+                    llm_cache.put_local(key, result)
                 return result
             else:
                 print(f"  ⚠️ Empty response from Gemini")
@@ -63,9 +88,10 @@ def query_gemini(
             
             # Handle rate limiting
             if "429" in error_msg or "quota" in error_msg.lower() or "rate" in error_msg.lower():
+                breaker.record_failure()
                 if attempt < max_retries - 1:
-                    wait_time = 5 * (attempt + 1)
-                    print(f"  ⏳ Rate limited. Waiting {wait_time}s...")
+                    wait_time = backoff_delay(attempt, e)
+                    print(f"  ⏳ Rate limited. Waiting {wait_time:.1f}s...")
                     time.sleep(wait_time)
                     continue
                 else:
@@ -77,9 +103,13 @@ def query_gemini(
             # Other errors
             print(f"  ❌ Error: {error_msg[:200]}")
             
-            if attempt < max_retries - 1:
-                time.sleep(3)
-                continue
+            if not is_transient(e):
+                breaker.release()
+            else:
+                breaker.record_failure()
+                if attempt < max_retries - 1:
+                    time.sleep(backoff_delay(attempt, e))
+                    continue
             
             if use_fallback:
                 return _fallback_to_openrouter(prompt, max_tokens, temperature)
@@ -2,61 +2,63 @@
 GitHub API client for fetching issues and repository information.
 """
 import os
+import math
+import asyncio
+import httpx
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from utils.github_http import GITHUB_API_URL, get_github_client
+from utils.github_scheduler import github_scheduler, resource_for
+from utils.validator_store import validator_store, conditional_headers, entry_from_response
+from utils.skills import canonical_skills
 
-GITHUB_API_URL = "https://api.github.com"
+SEARCH_PAGE_SIZE = 100
+SEARCH_MAX_PAGES = 10  # GitHub serves at most 1000 results per search query
 
+# Shared keep-alive session for the synchronous (LangGraph) code path
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+))
 
-def _get_headers():
-    """Get GitHub API headers with authentication."""
-    token = os.getenv("GITHUB_TOKEN")
-    if not token:
-        raise ValueError("GITHUB_TOKEN not found in environment variables")
-    
-    return {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
 
-
-def search_good_first_issues(skills: List[str], max_results: int = 15) -> List[Dict]:
+def _request_sync(method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
     """
-    Search GitHub for 'good first issue' labeled issues matching the given skills.
+    Send a request on the shared session through the rate-limit scheduler.
     
-    Args:
-        skills: List of programming languages/frameworks
-        max_results: Maximum number of issues to return
-        
-    Returns:
-        List of issue dictionaries with url, title, repo, and labels
+    Rate-limited responses are retried on another token, or after the
+    bucket resets / Retry-After elapses when every token is exhausted.
     """
-    try:
-        headers = _get_headers()
-    except ValueError as e:
-        print(f"❌ ERROR: {e}")
-        return []
+    resource = resource_for(url)
     
-    # Map frameworks to their underlying languages
-    language_map = {
-        "fastapi": "python",
-        "django": "python",
-        "flask": "python",
-        "react": "javascript",
-        "vue": "javascript",
-        "angular": "typescript",
-        "express": "javascript",
-        "nextjs": "javascript",
-    }
+    for attempt in range(github_scheduler.max_attempts()):
+        token = github_scheduler.acquire_blocking(resource)
+        response = _session.request(
+            method,
+            url,
+            headers={
+                "Authorization": f"token {token}",
+                "Accept": "application/vnd.github.v3+json",
+                **(headers or {})
+            },
+            timeout=10,
+            **kwargs
+        )
+        
+        body = response.text if response.status_code in (403, 429) else ""
+        if not github_scheduler.record(token, resource, response.status_code, response.headers, body):
+            return response
+        
+        print(f"⚠️ GitHub {resource} rate limited (attempt {attempt + 1}), rescheduling...")
     
-    # Convert skills to proper GitHub languages
-    languages = set()
-    for skill in skills:
-        skill_lower = skill.lower()
-        if skill_lower in language_map:
-            languages.add(language_map[skill_lower])
-        else:
-            languages.add(skill_lower)
+    return response
+
+
+def _build_search_params(skills: List[str], max_results: int, page: int = 1) -> Dict[str, Any]:
+    """Build the search query parameters for the given skills."""
+    languages = canonical_skills(skills)
     
     # Build search query with proper languages
     if languages:
@@ -65,59 +67,228 @@ def search_good_first_issues(skills: List[str], max_results: int = 15) -> List[D
     else:
         query = 'is:issue is:open label:"good first issue"'
     
-    params = {
+    return {
         "q": query,
         "sort": "created",
         "order": "desc",
-        "per_page": max_results
+        "per_page": max_results,
+        "page": page
+    }
+
+
+def _parse_search_response(status_code: int, headers: Dict, data: Any) -> List[Dict]:
+    """Turn a search API response into issue dictionaries."""
+    print(f"📊 Response status: {status_code}")
+    
+    if status_code == 401:
+        print("❌ Authentication failed! Check your GitHub token.")
+        return []
+    
+    if status_code == 403:
+        print("❌ Rate limit exceeded or insufficient permissions!")
+        print(f"Rate limit: {headers.get('X-RateLimit-Remaining', 'unknown')}/{headers.get('X-RateLimit-Limit', 'unknown')}")
+        return []
+    
+    total_count = data.get("total_count", 0)
+    print(f"✅ GitHub returned {total_count} total issues")
+    
+    issues = []
+    
+    for item in data.get("items", []):
+        issues.append({
+            "url": item["html_url"],
+            "api_url": item["url"],
+            "title": item["title"],
+            "repo": item["repository_url"].split("/")[-1],
+            "labels": [label["name"] for label in item.get("labels", [])],
+            "created_at": item.get("created_at")
+        })
+    
+    print(f"✅ Processed {len(issues)} issues")
+    return issues
+
+
+def _format_issue_details(issue_data: Dict, comments_data: List[Dict]) -> Dict:
+    """Compile the issue and comments payloads into issue details."""
+    return {
+        "title": issue_data["title"],
+        "body": issue_data.get("body", ""),
+        "comments": [c.get("body", "") for c in comments_data[:5]],  # First 5 comments
+        "labels": [label["name"] for label in issue_data.get("labels", [])],
+        "created_at": issue_data["created_at"],
+        "state": issue_data["state"]
     }
+
+
+def _get_json_conditional(url: str) -> Any:
+    """GET JSON on the shared session, revalidating against the in-process validator store."""
+    entry = validator_store.get_local(url)
+    response = _request_sync("GET", url, headers=conditional_headers(entry))
+    
+    if response.status_code == 304 and entry is not None:
+        return entry["body"]
     
-    print(f"🔍 Searching GitHub with query: {query}")
+    response.raise_for_status()
+    body = response.json()
+    
+    new_entry = entry_from_response(response.headers, body)
+    if new_entry:
+        validator_store.put_local(url, new_entry)
+    
+    return body
+
+
+def search_good_first_issues(skills: List[str], max_results: int = 15) -> List[Dict]:
+    """
+    Search GitHub for 'good first issue' labeled issues matching the given skills.
+    
+    Args:
+        skills: List of programming languages/frameworks
+        max_results: Maximum number of issues to return
+    
+    Returns:
+        List of issue dictionaries with url, title, repo, and labels
+    """
+    params = _build_search_params(skills, max_results)
+    print(f"🔍 Searching GitHub with query: {params['q']}")
     
     try:
-        response = requests.get(
-            f"{GITHUB_API_URL}/search/issues",
-            headers=headers,
-            params=params,
-            timeout=10
-        )
-        
-        print(f"📊 Response status: {response.status_code}")
-        
-        if response.status_code == 401:
-            print("❌ Authentication failed! Check your GitHub token.")
-            return []
+        response = _request_sync("GET", f"{GITHUB_API_URL}/search/issues", params=params)
         
-        if response.status_code == 403:
-            print("❌ Rate limit exceeded or insufficient permissions!")
-            print(f"Rate limit: {response.headers.get('X-RateLimit-Remaining', 'unknown')}/{response.headers.get('X-RateLimit-Limit', 'unknown')}")
-            return []
+        if response.status_code not in (401, 403):
+            response.raise_for_status()
         
-        response.raise_for_status()
-        
-        data = response.json()
-        total_count = data.get("total_count", 0)
-        print(f"✅ GitHub returned {total_count} total issues")
-        
-        issues = []
-        
-        for item in data.get("items", []):
-            issues.append({
-                "url": item["html_url"],
-                "api_url": item["url"],
-                "title": item["title"],
-                "repo": item["repository_url"].split("/")[-1],
-                "labels": [label["name"] for label in item.get("labels", [])]
-            })
-        
-        print(f"✅ Processed {len(issues)} issues")
-        return issues
+        data = response.json() if response.ok else {}
+        return _parse_search_response(response.status_code, response.headers, data)
+    
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return []
     
     except Exception as e:
         print(f"❌ Error fetching issues: {e}")
         return []
 
 
+async def _search_page(language: Optional[str], page: int, per_page: int) -> Tuple[List[Dict], Optional[int]]:
+    """Fetch one page of search results for one language (total count None on auth/limit errors)."""
+    params = _build_search_params([language] if language else [], per_page, page)
+    
+    response = await get_github_client().get("/search/issues", params=params)
+    
+    if response.status_code not in (401, 403):
+        response.raise_for_status()
+    
+    data = response.json() if response.is_success else {}
+    total_count = data.get("total_count", 0) if response.is_success else None
+    return _parse_search_response(response.status_code, response.headers, data), total_count
+
+
+async def stream_good_first_issues(
+    skills: List[str],
+    max_results: int = 15,
+    total_counts: Optional[Dict[Optional[str], Optional[int]]] = None
+) -> AsyncIterator[Dict]:
+    """
+    Stream 'good first issue' search results as they arrive.
+    
+    Runs one search per mapped language concurrently. Once a language's
+    first page reports its total count, its remaining pages are fetched
+    concurrently too. Issues are de-duplicated by URL.
+    
+    Args:
+        skills: List of programming languages/frameworks
+        max_results: Maximum number of issues wanted per language
+        total_counts: Optional dict filled with GitHub's total_count per
+            language (None for a language with a failed page)
+        
+    Yields:
+        Issue dictionaries with url, title, repo, labels and created_at
+    """
+    languages = canonical_skills(skills) or [None]
+    per_page = min(max_results, SEARCH_PAGE_SIZE)
+    max_pages = min(math.ceil(max_results / per_page), SEARCH_MAX_PAGES)
+    
+    print(f"🔍 Searching GitHub for {len(languages)} language(s), up to {max_pages} page(s) each...")
+    
+    pending = {
+        asyncio.create_task(_search_page(language, 1, per_page)): (language, 1)
+        for language in languages
+    }
+    seen = set()
+    if total_counts is None:
+        total_counts = {}
+    
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            
+            for task in done:
+                language, page = pending.pop(task)
+                
+                try:
+                    issues, total_count = task.result()
+                except ValueError as e:
+                    print(f"❌ ERROR: {e}")
+                    total_counts[language] = None
+                    continue
+                except Exception as e:
+                    print(f"❌ Error fetching issues ({language}, page {page}): {e}")
+                    total_counts[language] = None
+                    continue
+                
+                if total_count is None:
+                    total_counts[language] = None
+                elif page == 1:
+                    total_counts[language] = total_count
+                    last_page = min(math.ceil(total_count / per_page), max_pages)
+                    for next_page in range(2, last_page + 1):
+                        pending[asyncio.create_task(_search_page(language, next_page, per_page))] = (language, next_page)
+                
+                for issue in issues:
+                    if issue["url"] not in seen:
+                        seen.add(issue["url"])
+                        yield issue
+    
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def search_is_exhaustive(total_counts: Dict[Optional[str], Optional[int]], skills: List[str], found: int) -> bool:
+    """
+    Whether a search returned every matching issue.
+    
+    True when every language's search succeeded and GitHub's total counts
+    add up to no more than the number of issues found.
+    """
+    languages = canonical_skills(skills) or [None]
+    counts = [total_counts.get(language) for language in languages]
+    return all(count is not None for count in counts) and sum(counts) <= found
+
+
+async def search_good_first_issues_async(
+    skills: List[str],
+    max_results: int = 15,
+    total_counts: Optional[Dict[Optional[str], Optional[int]]] = None
+) -> List[Dict]:
+    """
+    Search GitHub for 'good first issue' issues with per-language fan-out.
+    
+    Args:
+        skills: List of programming languages/frameworks
+        max_results: Maximum number of issues to return
+        total_counts: Optional dict filled with GitHub's total_count per language
+        
+    Returns:
+        Merged list of issue dictionaries, newest first
+    """
+    issues = [issue async for issue in stream_good_first_issues(skills, max_results, total_counts)]
+    issues.sort(key=lambda issue: issue.get("created_at") or "", reverse=True)
+    
+    print(f"✅ Merged {len(issues)} unique issues")
+    return issues[:max_results]
+
 
 def get_issue_details(issue_api_url: str) -> Dict:
     """
@@ -125,38 +296,62 @@ def get_issue_details(issue_api_url: str) -> Dict:
     
     Args:
         issue_api_url: The API URL for the issue
-        
+    
     Returns:
         Dictionary with issue body, comments, and related file info
     """
     try:
-        headers = _get_headers()
+        # Get issue details (served from the validator store on 304)
+        issue_data = _get_json_conditional(issue_api_url)
+        
+        # Get comments
+        try:
+            comments_data = _get_json_conditional(issue_data["comments_url"])
+        except requests.HTTPError:
+            comments_data = []
+        
+        return _format_issue_details(issue_data, comments_data)
+    
     except ValueError as e:
         print(f"❌ ERROR: {e}")
         return {"title": "", "body": "", "comments": []}
     
+    except Exception as e:
+        print(f"❌ Error fetching issue details: {e}")
+        return {"title": "", "body": "", "comments": []}
+
+
+async def get_issue_details_async(issue_api_url: str) -> Dict:
+    """
+    Async version of get_issue_details using the pooled GitHub client.
+    
+    Args:
+        issue_api_url: The API URL for the issue
+    
+    Returns:
+        Dictionary with issue body, comments, and related file info
+    """
+    client = get_github_client()
+    
     try:
-        # Get issue details
-        response = requests.get(issue_api_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        issue_data = response.json()
+        issue_data = await client.get_json(issue_api_url)
         
-        # Get comments
-        comments_response = requests.get(
-            issue_data["comments_url"],
-            headers=headers,
-            timeout=10
-        )
-        comments_data = comments_response.json() if comments_response.ok else []
+        try:
+            comments_data = await client.get_json(issue_data["comments_url"])
+        except httpx.HTTPStatusError:
+            comments_data = []
         
-        return {
-            "title": issue_data["title"],
-            "body": issue_data.get("body", ""),
-            "comments": [c.get("body", "") for c in comments_data[:5]],  # First 5 comments
-            "created_at": issue_data["created_at"],
-            "state": issue_data["state"]
-        }
+        return _format_issue_details(issue_data, comments_data)
+    
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return {"title": "", "body": "", "comments": []}
     
     except Exception as e:
         print(f"❌ Error fetching issue details: {e}")
         return {"title": "", "body": "", "comments": []}
+
+
+async def get_issues_details_async(issue_api_urls: List[str]) -> List[Dict]:
+    """Fetch details for several issues concurrently over the shared pool."""
+    return await asyncio.gather(*(get_issue_details_async(url) for url in issue_api_urls))
@@ -0,0 +1,179 @@
+"""
+Batched GitHub GraphQL fetches for issue contexts.
+
+Resolves many issues plus their first comments in one round trip per chunk
+instead of two REST calls per issue.
+"""
+import re
+import asyncio
+from typing import List, Dict, Optional, Tuple
+from utils.github_http import GITHUB_API_URL, get_github_client
+
+GRAPHQL_CHUNK_SIZE = 25
+
+_ISSUE_URL_RE = re.compile(
+    r"^https?://(?:api\.)?github\.com/(?:repos/)?([^/]+)/([^/]+)/issues/(\d+)"
+)
+
+_ISSUE_FIELDS = """
+fragment IssueFields on Issue {
+  title
+  body
+  state
+  createdAt
+  url
+  labels(first: 20) { nodes { name } }
+  comments(first: $comments) { nodes { body } }
+}
+"""
+
+
+def parse_issue_url(url: str) -> Optional[Tuple[str, str, int]]:
+    """
+    Parse an issue HTML or API URL into (owner, repo, number).
+    
+    Returns:
+        Tuple of owner, repo and issue number, or None if not an issue URL
+    """
+    match = _ISSUE_URL_RE.match(url.strip())
+    if not match:
+        return None
+    
+    owner, repo, number = match.groups()
+    return owner, repo, int(number)
+
+
+def build_issues_query(refs: List[Tuple[str, str, int]]) -> Tuple[str, Dict]:
+    """Build one aliased GraphQL query (and variables) for a chunk of issues."""
+    declarations = ["$comments: Int!"]
+    selections = []
+    variables = {}
+    
+    for i, (owner, repo, number) in enumerate(refs):
+        declarations.append(f"$o{i}: String!, $r{i}: String!, $n{i}: Int!")
+        selections.append(
+            f"  i{i}: repository(owner: $o{i}, name: $r{i}) {{ issue(number: $n{i}) {{ ...IssueFields }} }}"
+        )
+        variables.update({f"o{i}": owner, f"r{i}": repo, f"n{i}": number})
+    
+    query = f"query({', '.join(declarations)}) {{\n" + "\n".join(selections) + "\n}\n" + _ISSUE_FIELDS
+    return query, variables
+
+
+def parse_issues_response(
+    payload: Dict,
+    urls: List[str],
+    max_comments: int
+) -> Dict[str, Dict]:
+    """
+    Map each requested URL to issue details in the get_issue_details shape.
+    
+    Issues GraphQL could not resolve (deleted, private, transferred) are
+    left out so callers can fall back to REST for them.
+    """
+    data = payload.get("data") or {}
+    details = {}
+    
+    for i, url in enumerate(urls):
+        issue = (data.get(f"i{i}") or {}).get("issue")
+        if not issue:
+            continue
+        
+        details[url] = {
+            "title": issue["title"],
+            "body": issue.get("body") or "",
+            "comments": [c.get("body", "") for c in issue["comments"]["nodes"][:max_comments]],
+            "created_at": issue["createdAt"],
+            "state": issue["state"].lower(),
+            "labels": [label["name"] for label in issue["labels"]["nodes"]]
+        }
+    
+    return details
+
+
+def _chunks(urls: List[str], chunk_size: int) -> List[Tuple[List[str], List[Tuple[str, str, int]]]]:
+    """Split parseable issue URLs into chunks of (urls, refs)."""
+    parsed = [(url, parse_issue_url(url)) for url in urls]
+    parsed = [(url, ref) for url, ref in parsed if ref]
+    
+    return [
+        ([url for url, _ in parsed[i:i + chunk_size]], [ref for _, ref in parsed[i:i + chunk_size]])
+        for i in range(0, len(parsed), chunk_size)
+    ]
+
+
+async def _fetch_chunk(urls: List[str], refs: List[Tuple[str, str, int]], max_comments: int) -> Dict[str, Dict]:
+    """Fetch one chunk of issues in a single GraphQL request."""
+    query, variables = build_issues_query(refs)
+    variables["comments"] = max_comments
+    
+    try:
+        response = await get_github_client().post("/graphql", json={"query": query, "variables": variables})
+        response.raise_for_status()
+        return parse_issues_response(response.json(), urls, max_comments)
+    
+    except Exception as e:
+        print(f"❌ GraphQL batch fetch failed: {e}")
+        return {}
+
+
+async def fetch_issue_contexts(
+    urls: List[str],
+    max_comments: int = 5,
+    chunk_size: int = GRAPHQL_CHUNK_SIZE
+) -> Dict[str, Dict]:
+    """
+    Fetch details for many issues with one GraphQL query per chunk.
+    
+    Args:
+        urls: Issue HTML or API URLs
+        max_comments: Number of leading comments to include per issue
+        chunk_size: Maximum issues per GraphQL query
+    
+    Returns:
+        Dictionary mapping each resolved URL to its issue details
+    """
+    chunks = _chunks(urls, chunk_size)
+    if not chunks:
+        return {}
+    
+    print(f"  🔗 GraphQL: fetching {len(urls)} issue(s) in {len(chunks)} request(s)...")
+    results = await asyncio.gather(*(_fetch_chunk(c_urls, refs, max_comments) for c_urls, refs in chunks))
+    
+    details = {}
+    for result in results:
+        details.update(result)
+    return details
+
+
+def fetch_issue_contexts_sync(
+    urls: List[str],
+    max_comments: int = 5,
+    chunk_size: int = GRAPHQL_CHUNK_SIZE
+) -> Dict[str, Dict]:
+    """Synchronous version of fetch_issue_contexts for the LangGraph path."""
+    from utils.github_client import _request_sync
+    
+    details = {}
+    
+    for c_urls, refs in _chunks(urls, chunk_size):
+        query, variables = build_issues_query(refs)
+        variables["comments"] = max_comments
+        
+        try:
+            response = _request_sync(
+                "POST",
+                f"{GITHUB_API_URL}/graphql",
+                json={"query": query, "variables": variables}
+            )
+            response.raise_for_status()
+            details.update(parse_issues_response(response.json(), c_urls, max_comments))
+        
+        except ValueError as e:
+            print(f"❌ ERROR: {e}")
+            return details
+        
+        except Exception as e:
+            print(f"❌ GraphQL batch fetch failed: {e}")
+    
+    return details
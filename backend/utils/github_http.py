@@ -0,0 +1,155 @@
+"""
+Async GitHub HTTP client with a shared keep-alive connection pool.
+"""
+import os
+from typing import Optional, Dict, Any
+import httpx
+from utils.github_scheduler import github_scheduler, resource_for
+from utils.validator_store import validator_store, conditional_headers, entry_from_response
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package (installed by httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class AsyncGitHubClient:
+    """
+    Pooled async client for the GitHub REST and GraphQL APIs.
+    
+    One instance is shared by the whole process so TLS sessions and
+    keep-alive connections are reused across requests.
+    """
+    
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None
+    ):
+        max_connections = max_connections or int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+        max_keepalive = max_keepalive or int(os.getenv("GITHUB_MAX_KEEPALIVE", "10"))
+        timeout = timeout or float(os.getenv("GITHUB_TIMEOUT", "10"))
+        connect_timeout = connect_timeout or float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+        
+        if http2 is None:
+            http2 = os.getenv("GITHUB_HTTP2", "1") == "1"
+        self.http2 = http2 and _http2_available()
+        
+        self._client = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            headers={"Accept": "application/vnd.github.v3+json"}
+        )
+    
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        Send a request through the rate-limit scheduler.
+        
+        Rate-limited responses are retried on another token, or after the
+        bucket resets / Retry-After elapses when every token is exhausted.
+        """
+        resource = resource_for(url)
+        
+        for attempt in range(github_scheduler.max_attempts()):
+            token = await github_scheduler.acquire(resource)
+            response = await self._client.request(
+                method,
+                url,
+                params=params,
+                json=json,
+                headers={"Authorization": f"token {token}", **(headers or {})}
+            )
+            
+            body = response.text if response.status_code in (403, 429) else ""
+            if not github_scheduler.record(token, resource, response.status_code, response.headers, body):
+                return response
+            
+            print(f"⚠️ GitHub {resource} rate limited (attempt {attempt + 1}), rescheduling...")
+        
+        return response
+    
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """GET an API path or absolute API URL."""
+        return await self.request("GET", url, params=params, headers=headers)
+    
+    async def get_json(self, url: str) -> Any:
+        """
+        GET an API URL as JSON using conditional requests.
+        
+        Sends the stored ETag / Last-Modified validators and serves the
+        stored body when GitHub answers 304 Not Modified.
+        """
+        entry = await validator_store.get(url)
+        response = await self.get(url, headers=conditional_headers(entry))
+        
+        if response.status_code == 304 and entry is not None:
+            return entry["body"]
+        
+        response.raise_for_status()
+        body = response.json()
+        
+        new_entry = entry_from_response(response.headers, body)
+        if new_entry:
+            await validator_store.put(url, new_entry)
+        
+        return body
+    
+    async def post(
+        self,
+        url: str,
+        json: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """POST JSON to an API path or absolute API URL."""
+        return await self.request("POST", url, json=json, headers=headers)
+    
+    async def aclose(self):
+        """Close all pooled connections."""
+        await self._client.aclose()
+
+
+# Global instance
+_github_client: Optional[AsyncGitHubClient] = None
+
+
+def get_github_client() -> AsyncGitHubClient:
+    """Get the shared async GitHub client, creating it on first use."""
+    global _github_client
+    if _github_client is None:
+        _github_client = AsyncGitHubClient()
+        print(f"🔌 GitHub client ready (HTTP/2: {'on' if _github_client.http2 else 'off'})")
+    return _github_client
+
+
+async def close_github_client():
+    """Close the shared async GitHub client."""
+    global _github_client
+    if _github_client is not None:
+        await _github_client.aclose()
+        _github_client = None
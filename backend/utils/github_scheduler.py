@@ -0,0 +1,195 @@
+"""
+Rate-limit-aware scheduling of GitHub API requests across a pool of tokens.
+
+Tracks the core, search and graphql buckets of every configured token from
+the X-RateLimit-* response headers, rotates requests across tokens, and
+queues (rather than fails) requests while every bucket is exhausted.
+"""
+import os
+import time
+import asyncio
+import threading
+from typing import List, Dict, Optional, Tuple
+
+# Secondary rate limits without a Retry-After header: GitHub asks for >= 1 minute
+SECONDARY_LIMIT_WAIT = 60.0
+
+
+def resource_for(url: str) -> str:
+    """Get the rate-limit bucket a request URL is charged against."""
+    if "/search/" in url:
+        return "search"
+    if url.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+def _load_tokens() -> List[str]:
+    """Read GITHUB_TOKENS (comma separated) plus GITHUB_TOKEN from the environment."""
+    tokens = [t.strip() for t in os.getenv("GITHUB_TOKENS", "").split(",") if t.strip()]
+    single = os.getenv("GITHUB_TOKEN")
+    if single and single not in tokens:
+        tokens.append(single)
+    return tokens
+
+
+class _Bucket:
+    """Last known state of one token's bucket for one resource."""
+    
+    def __init__(self):
+        self.remaining: Optional[int] = None  # Unknown until the first response
+        self.reset_at: float = 0.0
+
+
+class GitHubScheduler:
+    """
+    Picks a token for each request and learns bucket state from responses.
+    
+    Token choice prefers the token with the most remaining requests in the
+    relevant bucket, rotating between tokens that are tied.
+    """
+    
+    def __init__(self, tokens: Optional[List[str]] = None, max_wait: Optional[float] = None):
+        self._tokens = tokens
+        self.max_wait = max_wait or float(os.getenv("GITHUB_MAX_QUEUE_WAIT", "90"))
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._cursor = 0
+        self._lock = threading.Lock()  # The sync path calls in from worker threads
+    
+    @property
+    def tokens(self) -> List[str]:
+        """Configured tokens, read lazily so .env loading order does not matter."""
+        if self._tokens is None:
+            self._tokens = _load_tokens()
+        return self._tokens
+    
+    def _bucket(self, token: str, resource: str) -> _Bucket:
+        key = (token, resource)
+        if key not in self._buckets:
+            self._buckets[key] = _Bucket()
+        return self._buckets[key]
+    
+    def _choose(self, resource: str) -> Tuple[Optional[str], float]:
+        """
+        Reserve a token for one request.
+        
+        Returns:
+            (token, 0) when a token is available, otherwise (None, seconds
+            until the earliest bucket or secondary limit clears)
+        """
+        tokens = self.tokens
+        if not tokens:
+            raise ValueError("GITHUB_TOKEN not found in environment variables")
+        
+        now = time.time()
+        
+        with self._lock:
+            best, best_remaining = None, -1
+            earliest = float("inf")
+            
+            for i in range(len(tokens)):
+                token = tokens[(self._cursor + i) % len(tokens)]
+                bucket = self._bucket(token, resource)
+                
+                if bucket.remaining is not None and bucket.reset_at <= now:
+                    bucket.remaining = None  # Window rolled over
+                
+                blocked_until = self._blocked_until.get(token, 0.0)
+                if blocked_until > now:
+                    earliest = min(earliest, blocked_until)
+                    continue
+                
+                if bucket.remaining is not None and bucket.remaining <= 0:
+                    earliest = min(earliest, bucket.reset_at)
+                    continue
+                
+                remaining = bucket.remaining if bucket.remaining is not None else float("inf")
+                if remaining > best_remaining:
+                    best, best_remaining = token, remaining
+            
+            if best is None:
+                return None, max(earliest - now, 0.1)
+            
+            self._cursor = (tokens.index(best) + 1) % len(tokens)
+            bucket = self._bucket(best, resource)
+            if bucket.remaining is not None:
+                bucket.remaining -= 1  # Optimistic reservation until the response arrives
+            
+            return best, 0.0
+    
+    async def acquire(self, resource: str) -> str:
+        """Wait (without blocking the event loop) until a token can be used."""
+        waited = 0.0
+        
+        while True:
+            token, wait = self._choose(resource)
+            if token:
+                return token
+            
+            if waited + wait > self.max_wait:
+                raise RuntimeError(f"GitHub {resource} rate limit exhausted on all {len(self.tokens)} token(s)")
+            
+            print(f"⏳ GitHub {resource} limit reached on all tokens, queueing for {wait:.0f}s...")
+            await asyncio.sleep(wait)
+            waited += wait
+    
+    def acquire_blocking(self, resource: str) -> str:
+        """Blocking version of acquire for the synchronous code path."""
+        waited = 0.0
+        
+        while True:
+            token, wait = self._choose(resource)
+            if token:
+                return token
+            
+            if waited + wait > self.max_wait:
+                raise RuntimeError(f"GitHub {resource} rate limit exhausted on all {len(self.tokens)} token(s)")
+            
+            print(f"⏳ GitHub {resource} limit reached on all tokens, queueing for {wait:.0f}s...")
+            time.sleep(wait)
+            waited += wait
+    
+    def record(self, token: str, resource: str, status_code: int, headers, body: str = "") -> bool:
+        """
+        Update bucket state from a response.
+        
+        Returns:
+            True if the request was rate limited and should be retried
+        """
+        now = time.time()
+        # GitHub reports the bucket it actually charged
+        resource = headers.get("X-RateLimit-Resource", resource)
+        
+        with self._lock:
+            bucket = self._bucket(token, resource)
+            
+            if headers.get("X-RateLimit-Remaining") is not None:
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Reset") is not None:
+                bucket.reset_at = float(headers["X-RateLimit-Reset"])
+            
+            if status_code not in (403, 429):
+                return False
+            
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None:
+                self._blocked_until[token] = now + float(retry_after)
+                return True
+            
+            if bucket.remaining == 0:
+                return True
+            
+            if status_code == 429 or "secondary rate limit" in body.lower():
+                self._blocked_until[token] = now + SECONDARY_LIMIT_WAIT
+                return True
+            
+            return False  # A genuine permission error
+    
+    def max_attempts(self) -> int:
+        """Retries allowed per request: one per token plus a few waits."""
+        return len(self.tokens) + 3
+
+
+# Global instance
+github_scheduler = GitHubScheduler()
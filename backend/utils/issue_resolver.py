@@ -0,0 +1,80 @@
+"""
+Resolve GitHub issue URLs into issue metadata without running a search.
+"""
+from typing import List, Dict, Optional
+from utils.github_http import GITHUB_API_URL
+from utils.github_graphql import parse_issue_url, fetch_issue_contexts
+from utils.lru_cache import LRUCache
+
+# Resolved metadata (url, api_url, title, repo, labels) by issue URL
+_resolved_issues = LRUCache(maxsize=2048, ttl_seconds=3600)
+
+
+def issue_from_url(url: str) -> Optional[Dict]:
+    """
+    Derive issue metadata from an issue URL alone.
+    
+    Returns:
+        Issue dictionary with url, api_url and repo, or None if the URL
+        is not a GitHub issue URL
+    """
+    ref = parse_issue_url(url)
+    if not ref:
+        return None
+    
+    owner, repo, number = ref
+    return {
+        "url": url,
+        "api_url": f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues/{number}",
+        "title": "Issue",
+        "repo": repo,
+        "labels": []
+    }
+
+
+async def resolve_issues(issue_urls: List[str]) -> List[Dict]:
+    """
+    Resolve issue URLs into the issue dictionaries the agents expect.
+    
+    Cached metadata is served from the in-process LRU. Everything else is
+    fetched in one batched GraphQL request; the fetched details are passed
+    along under 'details' so the analyzer does not fetch them again.
+    
+    Args:
+        issue_urls: GitHub issue HTML URLs
+    
+    Returns:
+        Issue dictionaries in the order of issue_urls (unparseable URLs dropped)
+    """
+    issues = []
+    missing = []
+    
+    for url in issue_urls:
+        cached = _resolved_issues.get(url)
+        if cached:
+            issues.append(dict(cached))
+            continue
+        
+        issue = issue_from_url(url)
+        if not issue:
+            print(f"⚠️ Not a GitHub issue URL: {url}")
+            continue
+        
+        issues.append(issue)
+        missing.append(issue)
+    
+    if missing:
+        fetched = await fetch_issue_contexts([issue["api_url"] for issue in missing])
+        
+        for issue in missing:
+            details = fetched.get(issue["api_url"])
+            if not details:
+                continue
+            
+            issue["title"] = details["title"]
+            issue["labels"] = details.get("labels", [])
+            _resolved_issues.set(issue["url"], dict(issue))
+            issue["details"] = details
+    
+    print(f"✅ Resolved {len(issues)} issue(s), {len(issues) - len(missing)} from memory")
+    return issues
@@ -0,0 +1,104 @@
+"""
+Content-addressed cache for LLM completions.
+
+Completions are keyed by a hash of (model, prompt, max_tokens, temperature),
+so re-submitting the same issue context returns the stored text instead of
+paying for the same inference again.
+"""
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+from database.connection import get_db
+from utils.lru_cache import LRUCache
+
+LLM_CACHE_TTL_HOURS = int(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+
+
+def cache_key(model: str, prompt: str, max_tokens: int, temperature: float) -> str:
+    """Hash of everything that determines a completion."""
+    payload = json.dumps([model, prompt, max_tokens, temperature])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier completion cache: a bounded in-process LRU in front of the
+    'llm_cache' MongoDB collection (when a database is connected).
+    
+    The in-process tier is locked, since the sync LangGraph path calls the
+    model clients from worker threads.
+    """
+    
+    def __init__(self, max_entries: int = 512, ttl_hours: int = LLM_CACHE_TTL_HOURS):
+        self.ttl_hours = ttl_hours
+        self._entries = LRUCache(maxsize=max_entries, ttl_seconds=ttl_hours * 3600)
+        self._lock = threading.Lock()
+    
+    def get_local(self, key: str) -> Optional[str]:
+        """Get an in-process completion."""
+        with self._lock:
+            return self._entries.get(key)
+    
+    def put_local(self, key: str, text: str):
+        """Store a completion in-process, evicting the least recently used."""
+        with self._lock:
+            self._entries.set(key, text)
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Get a completion, falling back to MongoDB."""
+        text = self.get_local(key)
+        if text is not None:
+            return text
+        
+        try:
+            db = await get_db()
+            if db is None:
+                return None
+            
+            result = await db.llm_cache.find_one({
+                "key": key,
+                "expires_at": {"$gt": datetime.utcnow()}
+            })
+            if result:
+                self.put_local(key, result["text"])
+                return result["text"]
+            
+            return None
+        
+        except Exception as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+            return None
+    
+    async def put(self, key: str, model: str, text: str) -> bool:
+        """Store a completion in-process and in MongoDB."""
+        self.put_local(key, text)
+        
+        try:
+            db = await get_db()
+            if db is None:
+                return False
+            
+            await db.llm_cache.update_one(
+                {"key": key},
+                {
+                    "$set": {
+                        "model": model,
+                        "text": text,
+                        "cached_at": datetime.utcnow(),
+                        "expires_at": datetime.utcnow() + timedelta(hours=self.ttl_hours)
+                    }
+                },
+                upsert=True
+            )
+            return True
+        
+        except Exception as e:
+            print(f"⚠️ LLM cache write failed: {e}")
+            return False
+
+
+# Global instance
+llm_cache = LLMCache(max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")))
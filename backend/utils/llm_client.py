@@ -0,0 +1,281 @@
+"""
+Async LLM client layer with shared, reused provider clients.
+
+Every provider is reached through one process-wide async client, so
+connection pools and TLS sessions are reused across calls, and agents can
+await `generate(...)` directly instead of occupying a worker thread.
+"""
+import os
+import time
+import asyncio
+from typing import Optional, Callable, Awaitable
+import httpx
+from utils.llm_cache import llm_cache, cache_key
+from utils.resilience import provider_breaker, is_transient, backoff
+from utils.admission import admission_controller
+from utils.context_budget import count_tokens
+from cerebras.cloud.sdk import AsyncCerebras
+from openai import AsyncOpenAI
+
+DEFAULT_MODELS = {
+    "cerebras": "llama-3.3-70b",
+    "openrouter": "google/gemini-2.0-flash-exp:free",
+    "gemini": "gemini-2.0-flash-exp",
+}
+
+# Async callback receiving each streamed text delta: on_token(delta). When a
+# stream is taken over by another call, the takeover's first delta comes as
+# on_token(delta, restart=True): discard the text received so far first.
+TokenCallback = Callable[..., Awaitable[None]]
+
+_async_cerebras: Optional[AsyncCerebras] = None
+_async_openrouter: Optional[AsyncOpenAI] = None
+_gemini_configured = False
+
+
+def _http_client() -> httpx.AsyncClient:
+    """Keep-alive connection pool handed to an SDK client."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "50")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+        ),
+        timeout=httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "60")), connect=10.0)
+    )
+
+
+def get_async_cerebras_client() -> AsyncCerebras:
+    """Get the shared async Cerebras client."""
+    global _async_cerebras
+    if _async_cerebras is None:
+        api_key = os.getenv("CEREBRAS_API_KEY")
+        if not api_key:
+            raise ValueError("CEREBRAS_API_KEY not found in environment variables")
+        
+        _async_cerebras = AsyncCerebras(api_key=api_key, http_client=_http_client())
+    return _async_cerebras
+
+
+def get_async_openrouter_client() -> AsyncOpenAI:
+    """Get the shared async OpenRouter (OpenAI-compatible) client."""
+    global _async_openrouter
+    if _async_openrouter is None:
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            raise ValueError("OPENROUTER_API_KEY not found in environment variables")
+        
+        _async_openrouter = AsyncOpenAI(
+            base_url="https://openrouter.ai/api/v1",
+            api_key=api_key,
+            http_client=_http_client(),
+            default_headers={
+                "HTTP-Referer": "http://localhost:8000",
+                "X-Title": "SourceSage",
+            }
+        )
+    return _async_openrouter
+
+
+def _configure_gemini():
+    """Configure the Gemini SDK once per process."""
+    global _gemini_configured
+    if not _gemini_configured:
+        from utils.gemini_client import get_gemini_client
+        get_gemini_client()
+        _gemini_configured = True
+
+
+async def _chat_completion(
+    client,
+    prompt: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    on_token: Optional[TokenCallback] = None
+) -> Optional[str]:
+    """
+    Run a chat completion on an OpenAI-style client.
+    
+    When on_token is given the completion is streamed and every text delta
+    is passed to it as soon as it arrives.
+    """
+    request = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    
+    if on_token is None:
+        response = await client.chat.completions.create(**request)
+        if response.choices and response.choices[0].message.content:
+            return response.choices[0].message.content.strip()
+        return None
+    
+    started = time.monotonic()
+    parts = []
+    stream = await client.chat.completions.create(**request, stream=True)
+    
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        
+        if not parts:
+            print(f"  ⏱️ First token after {(time.monotonic() - started) * 1000:.0f}ms")
+        parts.append(delta)
+        await on_token(delta)
+    
+    return "".join(parts).strip() or None
+
+
+async def _generate_cerebras(prompt: str, model: str, max_tokens: int, temperature: float, on_token=None) -> Optional[str]:
+    return await _chat_completion(get_async_cerebras_client(), prompt, model, max_tokens, temperature, on_token)
+
+
+async def _generate_openrouter(prompt: str, model: str, max_tokens: int, temperature: float, on_token=None) -> Optional[str]:
+    return await _chat_completion(get_async_openrouter_client(), prompt, model, max_tokens, temperature, on_token)
+
+
+async def _generate_gemini(prompt: str, model: str, max_tokens: int, temperature: float, on_token=None) -> Optional[str]:
+    import google.generativeai as genai
+    
+    _configure_gemini()
+    response = await genai.GenerativeModel(model).generate_content_async(
+        prompt,
+        generation_config=genai.GenerationConfig(
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+        )
+    )
+    
+    if response and response.text:
+        result = response.text.strip()
+        if on_token is not None:
+            # Not streamed: hand the whole completion over as one delta
+            await on_token(result)
+        return result
+    return None
+
+
+_PROVIDERS = {
+    "cerebras": _generate_cerebras,
+    "openrouter": _generate_openrouter,
+    "gemini": _generate_gemini,
+}
+
+
+async def generate(
+    prompt: str,
+    max_tokens: int = 512,
+    temperature: float = 0.7,
+    model: Optional[str] = None,
+    provider: str = "cerebras",
+    on_token: Optional[TokenCallback] = None,
+    use_cache: bool = True,
+    retries: int = 1
+) -> Optional[str]:
+    """
+    Generate a completion from any configured provider.
+    
+    Calls go through the provider/model's circuit breaker: an open circuit
+    returns None immediately so callers can fail over. Rate limits and
+    server errors are retried with jittered backoff honoring Retry-After,
+    unless some of the answer was already streamed.
+    Each attempt waits for a slot from the provider/model's admission
+    controller, which bounds in-flight calls and tokens per minute.
+    
+    Args:
+        prompt: The input prompt
+        max_tokens: Maximum tokens to generate
+        temperature: Sampling temperature
+        model: Model to use (provider default if omitted)
+        provider: "cerebras", "openrouter" or "gemini"
+        on_token: Optional async callback receiving streamed text deltas
+        use_cache: Serve and store the completion in the LLM response cache
+        retries: Retries after a transient (429/5xx/network) failure
+    
+    Returns:
+        Generated text or None if error
+    """
+    model = model or DEFAULT_MODELS[provider]
+    key = cache_key(model, prompt, max_tokens, temperature) if use_cache else None
+    
+    if key:
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            print(f"  ⚡ LLM cache hit ({model})")
+            if on_token is not None:
+                await on_token(cached)
+            return cached
+    
+    breaker = provider_breaker(provider, model)
+    admission = admission_controller(provider, model)
+    estimated_tokens = count_tokens(prompt) + max_tokens
+    
+    # A retry would stream the text again, so only retry before the first token
+    streamed = False
+    sink = None
+    if on_token is not None:
+        async def sink(delta: str):
+            nonlocal streamed
+            streamed = True
+            await on_token(delta)
+    
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            print(f"  ⛔ Circuit open for {provider} ({model}), skipping")
+            return None
+        
+        try:
+            print(f"  🧠 Calling {provider} ({model})...")
+            async with admission.slot(estimated_tokens):
+                result = await _PROVIDERS[provider](prompt, model, max_tokens, temperature, sink)
+            breaker.record_success()
+            
+            if result:
+                print(f"  ⚡ Generated {len(result)} characters")
+                if key:
+                    await llm_cache.put(key, model, result)
+            else:
+                print(f"  ⚠️ Empty response")
+            return result
+        
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        
+        except ValueError as e:
+            breaker.release()
+            print(f"❌ ERROR: {e}")
+            return None
+        
+        except Exception as e:
+            error_msg = str(e)
+            print(f"  ❌ Error ({provider}): {error_msg[:200]}")
+            
+            if not is_transient(e):
+                breaker.release()
+                if "401" in error_msg or "unauthorized" in error_msg.lower():
+                    print(f"  💡 Check the {provider.upper()} API key in .env")
+                return None
+            
+            breaker.record_failure()
+            if streamed:
+                print(f"  ⚠️ Failed mid-stream, not retrying")
+                return None
+            if attempt < retries:
+                await backoff(attempt, e)
+    
+    return None
+
+
+async def close_llm_clients():
+    """Close the shared provider clients."""
+    global _async_cerebras, _async_openrouter
+    if _async_cerebras is not None:
+        await _async_cerebras.close()
+        _async_cerebras = None
+    if _async_openrouter is not None:
+        await _async_openrouter.close()
+        _async_openrouter = None
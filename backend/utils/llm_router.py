@@ -0,0 +1,265 @@
+"""
+Latency-aware routing across the configured LLM providers.
+
+Each task tier lists interchangeable provider/model candidates. The router
+keeps rolling latency and error stats per candidate, sends each call to the
+fastest healthy one, and fires a hedged duplicate at the next candidate when
+the first runs past its p95 latency; whichever answers first wins and the
+other is cancelled.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from utils.llm_client import generate, TokenCallback
+from utils.llm_cache import llm_cache, cache_key
+from utils.resilience import provider_breaker
+
+# Candidates per tier: (provider, model, prior latency in seconds).
+# The prior orders candidates until they have enough samples of their own.
+TIERS = {
+    "large": [
+        ("cerebras", "llama-3.3-70b", 3.0),
+        ("gemini", "gemini-2.0-flash-exp", 6.0),
+        ("openrouter", "meta-llama/llama-3.3-70b-instruct:free", 10.0),
+    ],
+    "small": [
+        ("cerebras", "llama3.1-8b", 1.0),
+        ("gemini", "gemini-2.0-flash-exp", 4.0),
+        ("openrouter", "meta-llama/llama-3.2-3b-instruct:free", 6.0),
+    ],
+}
+
+PROVIDER_KEYS = {
+    "cerebras": "CEREBRAS_API_KEY",
+    "gemini": "GEMINI_API_KEY",
+    "openrouter": "OPENROUTER_API_KEY",
+}
+
+WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+MIN_SAMPLES = 5
+UNHEALTHY_ERROR_RATE = 0.5
+# Hedge delay while a candidate has too few samples for a p95
+DEFAULT_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "20"))
+
+
+class ProviderStats:
+    """Rolling latency and outcome window for one provider/model."""
+    
+    def __init__(self, window: int = WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+    
+    def record(self, latency: float, ok: bool):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile of recent successes, or None without enough samples."""
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+    
+    @property
+    def healthy(self) -> bool:
+        return len(self.outcomes) < MIN_SAMPLES or self.error_rate < UNHEALTHY_ERROR_RATE
+
+
+class LLMRouter:
+    """Ranks candidates by observed latency and races hedged requests."""
+    
+    def __init__(self, tiers: Dict[str, List[Tuple[str, str, float]]] = TIERS):
+        self.tiers = tiers
+        self._stats: Dict[Tuple[str, str], ProviderStats] = {}
+    
+    def stats(self, provider: str, model: str) -> ProviderStats:
+        key = (provider, model)
+        if key not in self._stats:
+            self._stats[key] = ProviderStats()
+        return self._stats[key]
+    
+    def candidates(self, tier: str) -> List[Tuple[str, str]]:
+        """
+        Configured candidates for a tier, best first.
+        
+        Healthy candidates come before unhealthy ones (kept as a last
+        resort), each ordered by median latency or their prior. Candidates
+        whose circuit breaker is open are left out.
+        """
+        ranked = []
+        for provider, model, prior in self.tiers[tier]:
+            if not os.getenv(PROVIDER_KEYS[provider]):
+                continue
+            if not provider_breaker(provider, model).available():
+                continue
+            
+            stats = self.stats(provider, model)
+            median = stats.percentile(0.5)
+            ranked.append((not stats.healthy, median if median is not None else prior, provider, model))
+        
+        return [(provider, model) for _, _, provider, model in sorted(ranked)]
+    
+    def hedge_delay(self, provider: str, model: str) -> float:
+        """How long to wait on a call before hedging it: its p95 latency."""
+        p95 = self.stats(provider, model).percentile(0.95)
+        return p95 if p95 is not None else DEFAULT_HEDGE_DELAY
+    
+    async def _attempt(
+        self,
+        provider: str,
+        model: str,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        on_token: Optional[TokenCallback]
+    ) -> Optional[str]:
+        """One timed call; cancelled calls are not recorded."""
+        started = time.monotonic()
+        result = await generate(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            model=model,
+            provider=provider,
+            on_token=on_token,
+            use_cache=False,
+            retries=0  # Fail over instead of backing off on the same candidate
+        )
+        self.stats(provider, model).record(time.monotonic() - started, bool(result))
+        return result
+    
+    async def route(
+        self,
+        tier: str,
+        prompt: str,
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        on_token: Optional[TokenCallback] = None,
+        use_cache: bool = True
+    ) -> Optional[str]:
+        """
+        Generate a completion on the best candidate of a tier.
+        
+        A call that fails moves on to the next candidate straight away; one
+        that runs past its p95 is hedged with the next candidate. When
+        streaming, the first call to produce a token owns the stream and
+        the other is cancelled. If the owner fails mid-stream, the call that
+        takes over sends its first token with restart=True.
+        
+        Returns:
+            Generated text or None if every candidate failed
+        """
+        candidates = self.candidates(tier)
+        if not candidates:
+            print(f"❌ ERROR: No LLM provider available for the '{tier}' tier")
+            return None
+        
+        if use_cache:
+            for _, model in candidates:
+                cached = await llm_cache.get(cache_key(model, prompt, max_tokens, temperature))
+                if cached is not None:
+                    print(f"  ⚡ LLM cache hit ({model})")
+                    if on_token is not None:
+                        await on_token(cached)
+                    return cached
+        
+        tasks: Dict[asyncio.Task, Tuple[str, str]] = {}
+        owner: List[asyncio.Task] = []
+        # Set when an owner failed after streaming; its successor restarts the stream
+        stream_lost = False
+        
+        def start(provider: str, model: str):
+            task = None
+            
+            async def forward(delta: str):
+                nonlocal stream_lost
+                restart = False
+                if not owner:
+                    owner.append(task)
+                    for other in tasks:
+                        if other is not task:
+                            other.cancel()
+                    restart, stream_lost = stream_lost, False
+                if owner[0] is task:
+                    if restart:
+                        await on_token(delta, restart=True)
+                    else:
+                        await on_token(delta)
+            
+            task = asyncio.create_task(self._attempt(
+                provider, model, prompt, max_tokens, temperature,
+                forward if on_token is not None else None
+            ))
+            tasks[task] = (provider, model)
+            return task
+        
+        remaining = list(candidates)
+        pending = {start(*remaining.pop(0))}
+        
+        try:
+            while pending:
+                timeout = None
+                if len(pending) == 1 and remaining and not owner:
+                    timeout = self.hedge_delay(*tasks[next(iter(pending))])
+                
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    if owner:
+                        continue  # The call started streaming while we waited: no hedge
+                    provider, model = remaining.pop(0)
+                    print(f"  🏁 Hedging with {provider} ({model}) after {timeout:.1f}s")
+                    pending.add(start(provider, model))
+                    continue
+                
+                for task in done:
+                    if owner and owner[0] is task:
+                        # The stream's owner failed: let the next call take over,
+                        # telling the listener to drop what was streamed so far
+                        owner.clear()
+                        stream_lost = True
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    
+                    result = task.result()
+                    if result:
+                        provider, model = tasks[task]
+                        if use_cache:
+                            await llm_cache.put(cache_key(model, prompt, max_tokens, temperature), model, result)
+                        return result
+                
+                if not pending and remaining:
+                    provider, model = remaining.pop(0)
+                    print(f"  🔄 Failing over to {provider} ({model})")
+                    pending.add(start(provider, model))
+            
+            return None
+        
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+# Global instance
+llm_router = LLMRouter()
+
+
+async def route(
+    tier: str,
+    prompt: str,
+    max_tokens: int = 512,
+    temperature: float = 0.7,
+    on_token: Optional[TokenCallback] = None,
+    use_cache: bool = True
+) -> Optional[str]:
+    """Generate a completion on the best provider for a tier ("large" or "small")."""
+    return await llm_router.route(tier, prompt, max_tokens, temperature, on_token, use_cache)
@@ -0,0 +1,89 @@
+"""
+Small in-process LRU cache with optional per-entry TTL and memory cap.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Hashable
+
+
+def approximate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value, in bytes."""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache.
+    
+    Entries older than ttl_seconds (when set) are treated as missing. When
+    max_bytes is set, entries are also evicted to keep their approximate
+    total size under it (values larger than max_bytes are not stored).
+    Not thread-safe; intended for use from the event loop.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, refreshing its recency."""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        
+        value, expires_at, _ = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.pop(key)
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entries."""
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = approximate_size(value) if self.max_bytes is not None else 0
+        
+        self.pop(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+        
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self._bytes -= evicted_size
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value."""
+        item = self._data.pop(key, None)
+        if item is None:
+            return default
+        
+        self._bytes -= item[2]
+        return item[0]
+    
+    def clear(self):
+        """Remove all entries."""
+        self._data.clear()
+        self._bytes = 0
+    
+    @property
+    def size_bytes(self) -> int:
+        """Approximate total size of the stored values (0 without max_bytes)."""
+        return self._bytes
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+    
+    def __len__(self) -> int:
+        return len(self._data)
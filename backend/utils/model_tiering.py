@@ -0,0 +1,95 @@
+"""
+Model tiering: send small, simple issues to the small model.
+
+Most good first issues are short, so the solution plan and proposal start
+on the small tier and escalate to the large one only when the issue is
+big or the small model's output fails a structural quality check.
+"""
+import os
+import re
+from typing import Dict, Optional
+from utils.context_budget import parse_context, compress, count_tokens
+from utils.cerebras_client import query_cerebras
+
+# Cerebras model per tier (the sync agents call Cerebras directly)
+CEREBRAS_TIER_MODELS = {
+    "small": "llama3.1-8b",
+    "large": "llama-3.3-70b",
+}
+
+# Labels marking issues simple enough for the small model
+TRIVIAL_LABELS = {"documentation", "docs", "typo", "spelling", "readme", "chore", "cleanup", "formatting", "style"}
+
+SMALL_BODY_TOKENS = int(os.getenv("MODEL_TIER_SMALL_BODY_TOKENS", "250"))
+SMALL_COMMENT_TOKENS = int(os.getenv("MODEL_TIER_SMALL_COMMENT_TOKENS", "150"))
+
+# Stages that default to the large model; the prompt stage always starts small
+TIERED_STAGES = {"solution", "report"}
+
+
+def choose_tier(analysis: Dict, stage: str) -> str:
+    """
+    Pick the model tier ("small" or "large") for a stage of one issue.
+    
+    Issues with a short description and little discussion, or labelled as
+    trivial (docs, typo, ...) and not long, go to the small model.
+    """
+    if stage not in TIERED_STAGES or os.getenv("MODEL_TIERING", "true").lower() == "false":
+        return "small" if stage == "prompt" else "large"
+    
+    sections = parse_context(analysis["context"])
+    body_tokens = count_tokens(compress(sections.get("description", "")))
+    comment_tokens = count_tokens(compress(sections.get("comments", "")))
+    labels = {label.lower() for label in analysis.get("labels", [])}
+    
+    if labels & TRIVIAL_LABELS and body_tokens <= 2 * SMALL_BODY_TOKENS:
+        return "small"
+    if body_tokens <= SMALL_BODY_TOKENS and comment_tokens <= SMALL_COMMENT_TOKENS:
+        return "small"
+    return "large"
+
+
+# Section keywords a proposal is expected to cover
+_PROPOSAL_SECTIONS = ["abstract", "problem", "solution", "implementation", "deliverable", "timeline", "benefit"]
+
+
+def is_well_formed(stage: str, text: Optional[str]) -> bool:
+    """
+    Structural quality check for a stage's output.
+    
+    solution: at least 4 numbered steps
+    prompt: substantial and not cut off mid-sentence
+    report: covers at least 4 of the expected proposal sections
+    """
+    stripped = (text or "").strip()
+    if len(stripped) < 200:
+        return False
+    
+    if stage == "solution":
+        return len(re.findall(r"^\s*(?:\*\*)?\d+[.)]", text, flags=re.MULTILINE)) >= 4
+    
+    if stage == "prompt":
+        return stripped[-1] in ".!?:)`*\"'"
+    
+    if stage == "report":
+        lowered = text.lower()
+        return sum(section in lowered for section in _PROPOSAL_SECTIONS) >= 4
+    
+    return True
+
+
+def query_tiered(stage: str, analysis: Dict, prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
+    """
+    Query Cerebras on the stage's tier for one issue.
+    
+    Output from the small model that fails is_well_formed is regenerated on
+    the large model.
+    """
+    tier = choose_tier(analysis, stage)
+    result = query_cerebras(prompt, max_tokens=max_tokens, temperature=temperature, model=CEREBRAS_TIER_MODELS[tier])
+    
+    if tier == "small" and not is_well_formed(stage, result):
+        print(f"  ↗️ Small-model {stage} output malformed, retrying on {CEREBRAS_TIER_MODELS['large']}")
+        result = query_cerebras(prompt, max_tokens=max_tokens, temperature=temperature, model=CEREBRAS_TIER_MODELS["large"])
+    
+    return result
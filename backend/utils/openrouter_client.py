@@ -5,22 +5,30 @@ import os
 import time
 from typing import Optional, List
 from openai import OpenAI
+from utils.llm_cache import llm_cache, cache_key
+from utils.resilience import provider_breaker, is_transient, backoff_delay
+
+
+_client: Optional[OpenAI] = None
 
 
 def get_openrouter_client():
-    """Get configured OpenRouter client."""
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise ValueError("OPENROUTER_API_KEY not found in environment variables")
-    
-    return OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-        default_headers={
-            "HTTP-Referer": "http://localhost:8000",
-            "X-Title": "SourceSage",
-        }
-    )
+    """Get the shared OpenRouter client (one connection pool per process)."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            raise ValueError("OPENROUTER_API_KEY not found in environment variables")
+        
+        _client = OpenAI(
+            base_url="https://openrouter.ai/api/v1",
+            api_key=api_key,
+            default_headers={
+                "HTTP-Referer": "http://localhost:8000",
+                "X-Title": "SourceSage",
+            }
+        )
+    return _client
 
 
 def query_llm_openrouter(
@@ -29,7 +37,8 @@ def query_llm_openrouter(
     temperature: float = 0.7,
     model: str = "google/gemini-2.0-flash-exp:free",  # Default to Gemini
     fallback_models: Optional[List[str]] = None,
-    max_retries: int = 2
+    max_retries: int = 2,
+    use_cache: bool = True
 ) -> Optional[str]:
     """
     Query OpenRouter's API with automatic retry and model fallback.
@@ -46,10 +55,19 @@ def query_llm_openrouter(
         model: Primary model to use
         fallback_models: List of backup models to try if primary fails
         max_retries: Number of retries per model
+        use_cache: Serve and store the completion in the in-process LLM cache
         
     Returns:
         Generated text or None if all attempts fail
     """
+    # Keyed by the requested model, whichever fallback ends up answering
+    key = cache_key(model, prompt, max_tokens, temperature) if use_cache else None
+    if key:
+        cached = llm_cache.get_local(key)
+        if cached is not None:
+            print(f"  ⚡ LLM cache hit ({model})")
+            return cached
+    
     # Set default fallback models if not provided
     if fallback_models is None:
         fallback_models = [
@@ -67,9 +85,16 @@ def query_llm_openrouter(
         return None
     
     for model_name in models_to_try:
+        model_short = model_name.split('/')[1][:25]
+        breaker = provider_breaker("openrouter", model_name)
+        
         for attempt in range(max_retries):
+            # Open circuit: fail over to the next model instead of waiting
+            if not breaker.allow():
+                print(f"  ⛔ Circuit open for {model_short}, trying next model...")
+                break
+            
             try:
-                model_short = model_name.split('/')[1][:25]
                 print(f"  🤖 Calling {model_short}...")
                 
                 response = client.chat.completions.create(
@@ -79,10 +104,13 @@ def query_llm_openrouter(
                     temperature=temperature
                 )
                 
+                breaker.record_success()
                 result = response.choices[0].message.content
                 
                 if result:
                     print(f"  ✅ Generated {len(result)} characters")
+                    if key:
+                        llm_cache.put_local(key, result.strip())
                     return result.strip()
                 else:
                     print(f"  ⚠️ Empty response")
@@ -93,9 +121,10 @@ def query_llm_openrouter(
                 
                 # Handle rate limiting
                 if "429" in error_msg or "rate limit" in error_msg.lower():
+                    breaker.record_failure()
                     if attempt < max_retries - 1:
-                        wait_time = 5 * (attempt + 1)  # 5s, 10s
-                        print(f"  ⏳ Rate limited. Waiting {wait_time}s...")
+                        wait_time = backoff_delay(attempt, e)  # Retry-After, or jittered 1s, 2s, ...
+                        print(f"  ⏳ Rate limited. Waiting {wait_time:.1f}s...")
                         time.sleep(wait_time)
                         continue
                     else:
@@ -104,19 +133,24 @@ def query_llm_openrouter(
                 
                 # Handle model not available
                 if "404" in error_msg or "No endpoints" in error_msg:
+                    breaker.release()
                     print(f"  ⚠️ {model_short} not available, trying next...")
                     break
                 
                 # Handle other errors
                 print(f"  ❌ Error: {error_msg[:150]}")
                 
-                if "401" in error_msg or "unauthorized" in error_msg.lower():
-                    print("  💡 Check OPENROUTER_API_KEY")
-                    return None
+                if not is_transient(e):
+                    breaker.release()
+                    if "401" in error_msg or "unauthorized" in error_msg.lower():
+                        print("  💡 Check OPENROUTER_API_KEY")
+                        return None
+                    break  # Try next model
                 
+                breaker.record_failure()
                 if attempt < max_retries - 1:
                     print(f"  🔄 Retrying...")
-                    time.sleep(3)
+                    time.sleep(backoff_delay(attempt, e))
                     continue
                 else:
                     break  # Try next model
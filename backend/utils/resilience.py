@@ -0,0 +1,191 @@
+"""
+Circuit breakers and backoff for LLM provider calls.
+
+A provider/model that keeps failing with 429s or 5xx is taken out of
+rotation for a while instead of being hammered by every request; after the
+reset timeout a single probe call decides whether it comes back.
+"""
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+MAX_BACKOFF = float(os.getenv("LLM_MAX_BACKOFF", "30"))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    
+    closed: calls pass; FAILURE_THRESHOLD transient failures in a row open it.
+    open: calls are refused until reset_timeout has passed.
+    half_open: one probe call passes; success closes, failure re-opens.
+    
+    Thread-safe, since the sync clients run in worker threads.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+    
+    def available(self) -> bool:
+        """Whether a call would currently be let through (without claiming it)."""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probing)
+    
+    def allow(self) -> bool:
+        """Claim permission for one call."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"  ✅ Circuit closed for {self.name}")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+    
+    def record_failure(self):
+        """Record a transient (429/5xx/network) failure."""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"  ⛔ Circuit opened for {self.name} ({self._failures} failures)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+    
+    def release(self):
+        """End a call that says nothing about provider health (e.g. a 400 or a cancellation)."""
+        with self._lock:
+            self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def provider_breaker(provider: str, model: str) -> CircuitBreaker:
+    """Get the shared breaker for a provider/model."""
+    name = f"{provider}:{model}"
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states() -> Dict[str, str]:
+    """Current state of every provider/model breaker."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers}
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """
+    HTTP status carried by an SDK error, if any.
+    
+    OpenAI-style SDKs set .status_code (or .response.status_code);
+    google-api-core exceptions (Gemini) set .code.
+    """
+    for code in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(code, int) and not isinstance(code, bool):
+            return code
+    return None
+
+
+# Whole-word hints of a transient failure in errors without a status code
+_TRANSIENT_HINTS = re.compile(
+    r"\b(429|rate[ _-]?limit(ed|s)?|quota|resource[ _]exhausted|timeout|timed out|"
+    r"connection|unavailable|overloaded)\b"
+)
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an error is a rate limit, server error or network failure."""
+    code = status_code(error)
+    if code is not None:
+        return code == 429 or code >= 500
+    
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    
+    return _TRANSIENT_HINTS.search(str(error).lower()) is not None
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by a Retry-After header on the error's response."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None, base: float = 1.0, cap: float = MAX_BACKOFF) -> float:
+    """
+    Delay before retry number attempt + 1.
+    
+    Honors Retry-After when the provider sent one, otherwise uses
+    exponential backoff with full jitter; both are capped at cap.
+    """
+    hint = retry_after(error) if error is not None else None
+    if hint is not None:
+        return min(cap, hint)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def backoff(attempt: int, error: Optional[Exception] = None):
+    """Sleep (without blocking the event loop) before retrying."""
+    delay = backoff_delay(attempt, error)
+    print(f"  ⏳ Backing off {delay:.1f}s...")
+    await asyncio.sleep(delay)
@@ -0,0 +1,84 @@
+"""
+Single-flight deduplication of concurrent identical work.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+
+def _consume(future: asyncio.Future):
+    # Mark a failure as retrieved even when nobody joined the flight
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation.
+    
+    Everyone who asks for a key while it is in flight shares its result (or
+    exception). With do(), waiters are shielded from each other: one waiter
+    going away does not cancel the work for the rest. With lead_or_join(),
+    the leader runs the work itself, so joiners are only shielded from its
+    cancellation if the leader shields its own run. Nothing is cached once
+    the flight lands. Not thread-safe; intended for use from the event loop.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+    
+    def _forget(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the run already in flight."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            flight.add_done_callback(_consume)
+            flight.add_done_callback(lambda done: self._forget(key, done))
+            self._flights[key] = flight
+        else:
+            print(f"🔗 Joining in-flight {self.name}: {key}")
+        
+        return await asyncio.shield(flight)
+    
+    def lead_or_join(self, keys: List[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, asyncio.Future]]:
+        """
+        Claim the keys nobody is working on and find the flights for the rest.
+        
+        The caller leads the claimed keys and must settle every one of them
+        with resolve() or reject(), even if it is cancelled (joiners see the
+        rejection); the joined flights can be awaited (through asyncio.shield)
+        for their results.
+        
+        Returns:
+            Tuple of the led keys and a dictionary of joined flights by key
+        """
+        loop = asyncio.get_running_loop()
+        leading, joined = [], {}
+        
+        for key in keys:
+            if key in self._flights:
+                joined[key] = self._flights[key]
+                continue
+            
+            future = loop.create_future()
+            future.add_done_callback(_consume)
+            self._flights[key] = future
+            leading.append(key)
+        
+        return leading, joined
+    
+    def resolve(self, key: Hashable, value: Any):
+        """Land a led flight with its result."""
+        future = self._flights.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+    
+    def reject(self, key: Hashable, error: Exception):
+        """Land a led flight with an error."""
+        future = self._flights.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
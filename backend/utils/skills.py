@@ -0,0 +1,42 @@
+"""
+Canonical form of user skill lists.
+
+Skills are searched on GitHub by language, so ["Python"], ["python"] and
+["django"] are the same search. Everything that keys on skills (the GitHub
+query, the search cache, in-flight search coalescing) goes through
+canonical_skills so they agree.
+"""
+from typing import List
+
+# Map frameworks to their underlying languages
+LANGUAGE_MAP = {
+    "fastapi": "python",
+    "django": "python",
+    "flask": "python",
+    "react": "javascript",
+    "vue": "javascript",
+    "angular": "typescript",
+    "express": "javascript",
+    "nextjs": "javascript",
+}
+
+
+def canonical_skills(skills: List[str]) -> List[str]:
+    """
+    Normalize skills to the sorted, de-duplicated GitHub languages they search.
+    
+    Example:
+        ["Django", " python", "React"] -> ["javascript", "python"]
+    """
+    languages = set()
+    for skill in skills:
+        skill_lower = skill.strip().lower()
+        if skill_lower:
+            languages.add(LANGUAGE_MAP.get(skill_lower, skill_lower))
+    
+    return sorted(languages)
+
+
+def skills_key(skills: List[str]) -> str:
+    """Cache key for a skill list."""
+    return "_".join(canonical_skills(skills))
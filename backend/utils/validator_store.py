@@ -0,0 +1,109 @@
+"""
+Conditional-request store for GitHub API responses.
+
+Keeps the ETag / Last-Modified validators and the last body seen for each
+API URL so repeat fetches can be answered by a (rate-limit free) 304.
+"""
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any
+from database.connection import get_db
+from utils.lru_cache import LRUCache
+
+
+class ValidatorStore:
+    """
+    Two-tier validator store: a bounded in-process LRU in front of the
+    'github_validators' MongoDB collection (when a database is connected).
+    
+    The in-process tier is locked, since the sync LangGraph path fetches
+    from worker threads.
+    """
+    
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+    
+    def get_local(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the in-process entry for a URL."""
+        with self._lock:
+            return self._entries.get(url)
+    
+    def put_local(self, url: str, entry: Dict[str, Any]):
+        """Store an entry in-process, evicting the least recently used."""
+        with self._lock:
+            self._entries.set(url, entry)
+    
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the entry for a URL, falling back to MongoDB."""
+        entry = self.get_local(url)
+        if entry is not None:
+            return entry
+        
+        try:
+            db = await get_db()
+            if db is None:
+                return None
+            
+            result = await db.github_validators.find_one({"url": url})
+            if result:
+                entry = {
+                    "etag": result.get("etag"),
+                    "last_modified": result.get("last_modified"),
+                    "body": result.get("body")
+                }
+                self.put_local(url, entry)
+                return entry
+            
+            return None
+        
+        except Exception as e:
+            print(f"⚠️ Validator read failed: {e}")
+            return None
+    
+    async def put(self, url: str, entry: Dict[str, Any]) -> bool:
+        """Store an entry in-process and in MongoDB."""
+        self.put_local(url, entry)
+        
+        try:
+            db = await get_db()
+            if db is None:
+                return False
+            
+            await db.github_validators.update_one(
+                {"url": url},
+                {"$set": {**entry, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+            return True
+        
+        except Exception as e:
+            print(f"⚠️ Validator write failed: {e}")
+            return False
+
+
+def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a stored entry."""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def entry_from_response(headers, body: Any) -> Optional[Dict[str, Any]]:
+    """Build a store entry from a 200 response, if it carries validators."""
+    etag = headers.get("ETag")
+    last_modified = headers.get("Last-Modified")
+    
+    if not etag and not last_modified:
+        return None
+    
+    return {"etag": etag, "last_modified": last_modified, "body": body}
+
+
+# Global instance
+validator_store = ValidatorStore()